@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du traitement des réunions (process_meetings + tri de update_all_meetings).
+Compare l'ancien chemin (3 parsings dateutil par réunion) au chemin actuel (un parsing, clés epoch)
+sur un calendrier synthétique.
+
+Usage (depuis la racine du projet): python Outils/bench_process_meetings.py [nb_evenements] [repetitions]
+"""
+
+import os
+import sys
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT) # config.ini est lu relativement au répertoire courant
+sys.path.insert(0, ROOT)
+import app # noqa: E402
+from dateutil import parser # noqa: E402
+
+def synthetic_events(count, seed=42):
+    """Événements au format Graph calendarView (dateTime naïf à 7 décimales)."""
+    rnd = random.Random(seed)
+    base = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=6)
+    events = []
+    for i in range(count):
+        start = base + timedelta(minutes=15 * rnd.randrange(42 * 4))
+        end = start + timedelta(minutes=15 * rnd.randint(1, 8))
+        online = rnd.random() < 0.7
+        events.append({
+            'id': f"AAMkAD{i:08d}", 'subject': f"Réunion synthétique {i}",
+            'start': {'dateTime': start.strftime('%Y-%m-%dT%H:%M:%S.0000000'), 'timeZone': 'UTC'},
+            'end': {'dateTime': end.strftime('%Y-%m-%dT%H:%M:%S.0000000'), 'timeZone': 'UTC'},
+            'isOnlineMeeting': online,
+            'onlineMeeting': {'joinUrl': f"https://teams.microsoft.com/l/meetup-join/19%3ameeting_{i:012d}%40thread.v2/0"} if online else None,
+            'attendees': [{'emailAddress': {'address': f"user{rnd.randrange(200)}@example.com"}} for _ in range(rnd.randint(1, 6))],
+            'location': {'displayName': ''}, 'isCancelled': rnd.random() < 0.05,
+        })
+    return events
+
+# --- Ancien chemin (copie de la version précédente, pour comparaison) ---
+def legacy_convert_to_paris_time(iso_str):
+    if not iso_str or not isinstance(iso_str, str): return None
+    try:
+        dt = parser.isoparse(iso_str)
+        if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(app.PARIS_TZ).isoformat(timespec='seconds')
+    except Exception:
+        return None
+
+def legacy_process_meetings(meetings_data, salle_name, current_time_paris):
+    processed = []
+    for m in meetings_data:
+        if m.get('isCancelled'): continue
+        start_str = legacy_convert_to_paris_time(m.get('start', {}).get('dateTime'))
+        end_str = legacy_convert_to_paris_time(m.get('end', {}).get('dateTime'))
+        if start_str is None or end_str is None: continue
+        start_dt = parser.isoparse(start_str)
+        end_dt = parser.isoparse(end_str)
+        status = "À venir"
+        if end_dt < current_time_paris: status = "Passée"
+        elif start_dt <= current_time_paris < end_dt: status = "En cours"
+        join_url = app.extract_join_url(m)
+        is_online = m.get('isOnlineMeeting', False) or bool(join_url)
+        attendees = sorted(list(set(
+            a.get('emailAddress', {}).get('address', '').lower()
+            for a in m.get('attendees', []) if a.get('emailAddress', {}).get('address')
+        )))
+        loc = (m.get('location') or {}).get('displayName', '').strip()
+        processed.append({
+            'id': f"{salle_name.lower().replace(' ', '_')}_{m.get('id', '')}",
+            'subject': m.get('subject', 'Réunion sans titre'),
+            'start': start_str, 'end': end_str, 'status': status, 'isOnline': is_online,
+            'joinUrl': join_url, 'attendees': attendees, 'salle': salle_name,
+            'location': loc or salle_name,
+            'lastUpdated': current_time_paris.isoformat(timespec='seconds')
+        })
+    return processed
+
+def legacy_cycle(events, now_paris):
+    data = legacy_process_meetings(events, 'bench', now_paris)
+    data.sort(key=lambda x: parser.isoparse(x['start']))
+    return data
+
+def current_cycle(events, now_paris):
+    data = app.process_meetings(events, 'bench', now_paris)
+    data.sort(key=lambda x: x['startTs'])
+    return data
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    events = synthetic_events(count)
+    now_paris = datetime.now(app.PARIS_TZ)
+    # Vérification: même résultat (statut désormais dérivé à la lecture, champs epoch/ID de réunion ajoutés)
+    legacy, current = legacy_cycle(events, now_paris), current_cycle(events, now_paris)
+    now_ts = now_paris.timestamp()
+    added = ('startTs', 'endTs', 'joinMeetingId', 'joinPasscode')
+    served = [dict({k: v for k, v in r.items() if k not in added}, status=app.meeting_status(r['startTs'], r['endTs'], now_ts))
+              for r in current]
+    assert served == [{k: v for k, v in r.items() if k != 'lastUpdated'} for r in legacy], "Les deux chemins divergent!"
+    print(f"{count} événements synthétiques, {len(current)} réunions traitées, meilleur de {repeat} passes:")
+    results = {}
+    for name, fn in (('ancien (dateutil x3)', legacy_cycle), ('actuel (epoch, 1 parsing)', current_cycle)):
+        results[name] = min(timeit.repeat(lambda: fn(events, now_paris), number=1, repeat=repeat))
+        print(f"  {name:<28} {results[name] * 1000:8.1f} ms")
+    old, new = results.values()
+    print(f"  Gain: x{old / new:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
+import time
+_STARTUP_T0 = time.perf_counter() # Chronométrage du démarrage (imports compris)
 import os
 import sys
-import subprocess
-import time
+if __name__ == '__main__' and '--install-deps' in sys.argv[1:]:
+    # Installation explicite (mise à jour du poste), avant tout import tiers: jamais sur le chemin de service
+    import subprocess
+    sys.exit(subprocess.call([sys.executable, '-m', 'pip', 'install', '--no-cache-dir', '-r',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'requirements.txt')]))
 import configparser
 import requests
 import json
@@ -10,81 +15,403 @@ import threading
 import pytz
 import re # Assuré importé
 from datetime import datetime, timedelta, timezone
-from dateutil import parser
-from flask import Flask, render_template, jsonify, request, send_from_directory, abort, Response # Assuré importé
+from flask import Flask, render_template, jsonify, request, abort, Response, g, has_request_context # Assuré importé
 from werkzeug.middleware.proxy_fix import ProxyFix
-from functools import wraps
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import traceback # Pour afficher les erreurs complètes
-
-# --- Installation des dépendances ---
-def install_requirements():
-    requirements_file = os.path.join(os.path.dirname(__file__), 'requirements.txt')
-    if os.path.exists(requirements_file):
-        print(f"Vérification/Installation dépendances depuis {requirements_file}...")
-        try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', '--upgrade', '--no-cache-dir', '-r', requirements_file])
-            print("Dépendances OK.")
-        except subprocess.CalledProcessError as e:
-            print(f"ERREUR FATALE: Échec installation dépendances (Code: {e.returncode}). Arrêt.")
-            sys.exit(1)
-        except Exception as ex:
-             print(f"ERREUR FATALE inattendue installation dépendances: {ex}. Arrêt.")
-             sys.exit(1)
-    else:
-        print(f"AVERTISSEMENT: {requirements_file} non trouvé. Assurez-vous que les paquets sont installés.")
+from functools import wraps, lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlencode, quote, unquote
+import html
+import collections
+import contextvars
+import copy
+import queue
+import atexit
+import logging
+import logging.handlers
+import uuid
+import ipaddress
+import types
+import signal
+import bisect
+try:
+    import fcntl # Verrou fichier de leadership (Unix/gunicorn)
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt # Windows (kiosques: python app.py)
+import gzip
+import hashlib
+import base64
+try:
+    import brotli # Optionnel: variante 'br' de /meetings.json si installé
+except ImportError:
+    brotli = None
+
+# --- Journalisation (JSON structuré, écriture hors des threads de requête) ---
+LOG_FORMATS = ('json', 'text')
+_log_request_id = contextvars.ContextVar('request_id', default=None) # Id de corrélation de la requête/du cycle en cours
+_LOG_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+class RequestIdFilter(logging.Filter):
+    """Ajoute l'id de corrélation courant (requête HTTP ou cycle de màj) à chaque enregistrement."""
+    def filter(self, record):
+        record.request_id = _log_request_id.get() or '-'
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement; les champs passés via extra={...} sont conservés tels quels."""
+    def format(self, record):
+        entry = {'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+                 'level': record.levelname, 'logger': record.name, 'msg': record.getMessage()}
+        if getattr(record, 'request_id', '-') != '-': entry['request_id'] = record.request_id
+        entry.update({k: v for k, v in vars(record).items() if k not in _LOG_RECORD_FIELDS})
+        if record.exc_info: entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text: entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s [%(request_id)s] %(message)s', '%H:%M:%S')
+
+class _PreparedQueueHandler(logging.handlers.QueueHandler):
+    # Message et pile formatés dans le thread appelant (args encore valides), le rendu JSON/texte
+    # et l'écriture sur stdout se font dans le thread du QueueListener
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info: record.exc_text, record.exc_info = logging.Formatter().formatException(record.exc_info), None
+        return record
+
+_log_listener = None
 
-install_requirements()
+def setup_logging(level='INFO', fmt='json'):
+    """(Re)configure la racine: QueueHandler non bloquant -> QueueListener -> stdout. Idempotent."""
+    global _log_listener
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+    if _log_listener: _log_listener.stop()
+    log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    queue_handler = _PreparedQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    for h in [h for h in root.handlers if isinstance(h, _PreparedQueueHandler)]: root.removeHandler(h)
+    root.addHandler(queue_handler)
+    # DEBUG pour l'application seulement: les bibliothèques (urllib3...) restent à INFO
+    root.setLevel(logging.INFO if level == 'DEBUG' else level)
+    logging.getLogger('teamsrooms').setLevel(level)
+    _log_listener.start()
+
+atexit.register(lambda: _log_listener and _log_listener.stop()) # Vider la file à l'arrêt
+log = logging.getLogger('teamsrooms')
+setup_logging()
+
+# --- Dépendances et chronométrage du démarrage ---
+# Rien n'est installé au chargement du module (chaque démarrage de worker gunicorn l'importe): on vérifie
+# seulement les versions installées. Installation explicite: python app.py --install-deps.
+# Modules lourds et rarement utilisés (asyncio, dateutil.parser, concurrent.futures, httpx) importés à la demande.
+REQUIREMENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'requirements.txt')
+STARTUP_PHASES = {} # Phase -> durée (s) depuis la phase précédente
+_startup_last = _STARTUP_T0
+
+def startup_mark(phase):
+    global _startup_last
+    now = time.perf_counter()
+    STARTUP_PHASES[phase], _startup_last = now - _startup_last, now
+
+def read_requirements(path=REQUIREMENTS_FILE):
+    """Épinglages de requirements.txt: {nom de distribution normalisé: version ou None si non épinglée}."""
+    pins = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line or line.startswith('-'): continue
+            m = re.match(r'([A-Za-z0-9][A-Za-z0-9._-]*)(?:\[[^\]]*\])?\s*(?:==\s*([^\s;,]+))?', line)
+            if m: pins[re.sub(r'[-_.]+', '-', m.group(1)).lower()] = m.group(2)
+    return pins
+
+def check_requirements(strict=False):
+    """Compare les distributions installées aux versions épinglées (métadonnées seulement, sans pip ni réseau).
+    Écarts journalisés; en mode strict, une dépendance absente ou d'une autre version arrête le processus."""
+    from importlib import metadata
+    try: pins = read_requirements()
+    except OSError: log.warning("%s non trouvé, dépendances non vérifiées.", REQUIREMENTS_FILE); return []
+    problems = []
+    for name, pinned in pins.items():
+        try: installed = metadata.version(name)
+        except metadata.PackageNotFoundError: problems.append(f"{name} absent"); continue
+        if pinned and installed != pinned: problems.append(f"{name} {installed} (attendu {pinned})")
+    if problems:
+        log.log(logging.CRITICAL if strict else logging.WARNING, "Dépendances non conformes à %s: %s. Installer avec: python app.py --install-deps",
+                os.path.basename(REQUIREMENTS_FILE), ', '.join(problems))
+        if strict: sys.exit(1)
+    else: log.info("Dépendances OK (%d vérifiées).", len(pins))
+    return problems
+
+startup_mark('imports')
 
 # --- Configuration Globale et Initialisation ---
 CONFIG_FILE = 'config.ini'
 MEETINGS_FILE = 'meetings.json'
 SALLES = {}
-ALLOWED_IPS = []
+ALLOWED_IPS = [] # Entrées telles que configurées (adresses, plages CIDR ou ALL)
+IP_ALLOWLIST = None # IPAllowlist compilée depuis ALLOWED_IPS
 AZURE_CONFIG = {}
 DEBUG_MODE = False
+LOG_LEVEL = 'INFO' # DEBUG, INFO, WARNING ou ERROR (DEBUG par défaut si DebugMode)
+LOG_FORMAT = 'json' # 'json' (une ligne JSON par événement) ou 'text'
 PARIS_TZ = None
+FETCH_MODE = 'batch' # 'batch' (POST /$batch), 'threads' (une requête par salle) ou 'async' (asyncio + httpx)
+FETCH_MODES = ('batch', 'threads', 'async')
+ASYNC_CONCURRENCY = 50 # Requêtes Graph simultanées max en mode async
+ADAPTIVE_REFRESH = True # Intervalle par salle selon l'activité (sinon toutes les salles toutes les 60s)
+REFRESH_MIN_INTERVAL = 60
+REFRESH_MAX_INTERVAL = 900
+GRAPH_BUDGET_PER_MIN = 120 # Requêtes Graph max par minute (toutes: calendriers, pages, corps, lookups, tokens; chaque élément d'un $batch)
+LOOKUP_CACHE_TTL = 3600 # Secondes de validité d'un joinUrl résolu via Graph
+LOOKUP_NEGATIVE_TTL = 60 # Secondes pendant lesquelles un ID introuvable n'est pas redemandé à Graph
+STREAM_MAX_CLIENTS = 20 # Flux SSE simultanés (chacun occupe un thread serveur)
+HTTP2_ENABLED = False # HTTP/2 vers Graph (nécessite httpx[http2])
+FETCH_BODY = 'auto' # 'auto' (corps demandé si lien ou ID absent du joinUrl), 'link' (si lien absent) ou 'always' (inclus dans calendarView)
+SCHEDULER_MODE = 'leader' # 'leader' (élection par verrou fichier) ou 'off' (lecture seule de MEETINGS_FILE)
+SYNC_MODE = 'full' # 'full' (fenêtre complète à chaque cycle) ou 'delta' (calendarView/delta)
+STARTUP_CHECK = 'verify' # 'verify' (écarts journalisés), 'strict' (arrêt si écart) ou 'off'
 
-def load_config():
-    global SALLES, ALLOWED_IPS, DEBUG_MODE, AZURE_CONFIG, PARIS_TZ
-    print(f"Chargement config: '{CONFIG_FILE}'...")
-    if not os.path.exists(CONFIG_FILE): print(f"ERREUR FATALE: '{CONFIG_FILE}' non trouvé."); sys.exit(1)
+# --- Liste d'IP autorisées (compilée au chargement de la config) ---
+class IPAllowlist:
+    """Adresses exactes dans un set, plages CIDR (IPv4/IPv6) dans un arbre binaire de préfixes par version:
+    une vérification parcourt au plus 32/128 bits, quel que soit le nombre d'entrées."""
+
+    def __init__(self, entries):
+        self.allow_all = not entries or 'ALL' in entries
+        self.exact = set()
+        self._tries = {4: {}, 6: {}} # noeud: {0: noeud, 1: noeud, 'net': fin de préfixe}
+        self.invalid = []
+        for entry in entries:
+            if entry == 'ALL': continue
+            try: net = ipaddress.ip_network(entry, strict=False)
+            except ValueError: self.invalid.append(entry); continue
+            if net.num_addresses == 1: self.exact.add(net.network_address); continue
+            node, bits = self._tries[net.version], int(net.network_address)
+            for i in range(net.prefixlen):
+                node = node.setdefault((bits >> (net.max_prefixlen - 1 - i)) & 1, {})
+            node['net'] = True
+
+    def __contains__(self, ip):
+        if self.allow_all: return True
+        try: addr = ipaddress.ip_address(ip)
+        except ValueError: return False
+        if addr.version == 6 and addr.ipv4_mapped: addr = addr.ipv4_mapped # ::ffff:a.b.c.d derrière un proxy double pile
+        if addr in self.exact: return True
+        node, bits, width = self._tries[addr.version], int(addr), addr.max_prefixlen
+        for i in range(width):
+            if 'net' in node: return True
+            node = node.get((bits >> (width - 1 - i)) & 1)
+            if node is None: return False
+        return 'net' in node
+
+class ConfigError(Exception):
+    """config.ini invalide: arrêt au démarrage, configuration courante conservée lors d'un rechargement."""
+
+# Instantané immuable de config.ini: remplacé d'un bloc (CONFIG) lors d'un rechargement à chaud
+ConfigSnapshot = collections.namedtuple('ConfigSnapshot', 'salles allowed_ips ip_allowlist azure settings mtime')
+CONFIG = None
+
+def read_config():
+    """Lit et valide CONFIG_FILE sans rien modifier. Retourne un ConfigSnapshot, lève ConfigError si invalide.
+    'settings' associe le nom des variables globales de [SETTINGS] à leur valeur."""
+    if not os.path.exists(CONFIG_FILE): raise ConfigError(f"'{CONFIG_FILE}' non trouvé.")
+    mtime = os.stat(CONFIG_FILE).st_mtime_ns
     config = configparser.ConfigParser(interpolation=None)
+    try: config.read(CONFIG_FILE, encoding='utf-8')
+    except configparser.Error as e: raise ConfigError(f"Lecture {CONFIG_FILE}: {e}")
+    # Salles
+    salles = {}
+    if config.has_section('SALLES'): salles = dict(config.items('SALLES'))
+    else: log.warning("Section [SALLES] manquante.")
+    # IPs
+    allowed_ips = []
+    if config.has_section('ALLOWED_IPS'):
+        items = [ip.strip() for _, ip in config.items('ALLOWED_IPS') if ip.strip()]
+        allowed_ips = [i.upper() if i.upper() == 'ALL' else i for i in items]
+    else: log.warning("Section [ALLOWED_IPS] manquante. Toutes IPs autorisées.")
+    ip_allowlist = IPAllowlist(allowed_ips)
+    if ip_allowlist.invalid: log.warning("Entrées [ALLOWED_IPS] invalides ignorées: %s", ip_allowlist.invalid)
+    # Azure Config (insensible à la casse)
+    if not config.has_section('AZURE'): raise ConfigError("Section [AZURE] manquante.")
+    azure = {k.lower(): v for k, v in config.items('AZURE')}
+    missing = [r for r in ('tenantid', 'clientid', 'clientsecret') if not azure.get(r)]
+    if missing: raise ConfigError(f"Clés Azure manquantes/vides: {', '.join(missing)}")
+    s = {}
+    # Debug Mode
+    try: s['DEBUG_MODE'] = config.getboolean('SETTINGS', 'DebugMode', fallback=False)
+    except ValueError: s['DEBUG_MODE'] = False; log.warning("Valeur DebugMode invalide.")
+    s['LOG_LEVEL'] = config.get('SETTINGS', 'LogLevel', fallback='DEBUG' if s['DEBUG_MODE'] else 'INFO').strip().upper()
+    if s['LOG_LEVEL'] not in ('DEBUG', 'INFO', 'WARNING', 'ERROR'): log.warning("LogLevel '%s' invalide, 'INFO' utilisé.", s['LOG_LEVEL']); s['LOG_LEVEL'] = 'INFO'
+    s['LOG_FORMAT'] = config.get('SETTINGS', 'LogFormat', fallback='json').strip().lower()
+    if s['LOG_FORMAT'] not in LOG_FORMATS: log.warning("LogFormat '%s' invalide, 'json' utilisé.", s['LOG_FORMAT']); s['LOG_FORMAT'] = 'json'
+    # Mode de récupération des calendriers
+    s['FETCH_MODE'] = config.get('SETTINGS', 'FetchMode', fallback='batch').strip().lower()
+    if s['FETCH_MODE'] not in FETCH_MODES: log.warning("FetchMode '%s' invalide, 'batch' utilisé.", s['FETCH_MODE']); s['FETCH_MODE'] = 'batch'
+    s['SYNC_MODE'] = config.get('SETTINGS', 'SyncMode', fallback='full').strip().lower()
+    if s['SYNC_MODE'] not in ('full', 'delta'): log.warning("SyncMode '%s' invalide, 'full' utilisé.", s['SYNC_MODE']); s['SYNC_MODE'] = 'full'
+    s['FETCH_BODY'] = config.get('SETTINGS', 'FetchBody', fallback='auto').strip().lower()
+    if s['FETCH_BODY'] not in ('auto', 'link', 'always'): log.warning("FetchBody '%s' invalide, 'auto' utilisé.", s['FETCH_BODY']); s['FETCH_BODY'] = 'auto'
+    try: s['ASYNC_CONCURRENCY'] = max(1, config.getint('SETTINGS', 'AsyncConcurrency', fallback=50))
+    except ValueError: s['ASYNC_CONCURRENCY'] = 50; log.warning("Valeur AsyncConcurrency invalide.")
+    try:
+        s['ADAPTIVE_REFRESH'] = config.getboolean('SETTINGS', 'AdaptiveRefresh', fallback=True)
+        s['REFRESH_MIN_INTERVAL'] = max(10, config.getint('SETTINGS', 'RefreshMinInterval', fallback=60))
+        s['REFRESH_MAX_INTERVAL'] = max(s['REFRESH_MIN_INTERVAL'], config.getint('SETTINGS', 'RefreshMaxInterval', fallback=900))
+        s['GRAPH_BUDGET_PER_MIN'] = max(1, config.getint('SETTINGS', 'GraphBudgetPerMinute', fallback=120))
+    except ValueError:
+        log.warning("Paramètres de rafraîchissement adaptatif invalides, valeurs par défaut.")
+        s.update(ADAPTIVE_REFRESH=True, REFRESH_MIN_INTERVAL=60, REFRESH_MAX_INTERVAL=900, GRAPH_BUDGET_PER_MIN=120)
     try:
-        config.read(CONFIG_FILE, encoding='utf-8')
-        # Fuseau horaire
-        try: PARIS_TZ = pytz.timezone('Europe/Paris'); print(f"Fuseau horaire OK: Europe/Paris")
-        except pytz.exceptions.UnknownTimeZoneError: print("ERREUR FATALE: Fuseau 'Europe/Paris' inconnu."); sys.exit(1)
-        # Salles
-        if config.has_section('SALLES'): SALLES = dict(config.items('SALLES')); print(f"Salles OK: {list(SALLES.keys())}")
-        else: print("AVERTISSEMENT: Section [SALLES] manquante.")
-        # IPs
-        ALLOWED_IPS = []
-        if config.has_section('ALLOWED_IPS'):
-            items = [ip.strip() for _, ip in config.items('ALLOWED_IPS') if ip.strip()]
-            ALLOWED_IPS = [i.upper() if i.upper() == 'ALL' else i for i in items]; print(f"IPs OK: {ALLOWED_IPS if ALLOWED_IPS else 'Toutes'}")
-        else: print("AVERTISSEMENT: Section [ALLOWED_IPS] manquante. Toutes IPs autorisées.")
-        # Azure Config (insensible à la casse)
-        AZURE_CONFIG = {}
-        if config.has_section('AZURE'):
-            items_lower = {k.lower(): v for k, v in config.items('AZURE')}; AZURE_CONFIG = items_lower
-            req = ['tenantid', 'clientid', 'clientsecret']; missing = [r for r in req if r not in AZURE_CONFIG or not AZURE_CONFIG[r]]
-            if missing: print(f"ERREUR FATALE: Clés Azure manquantes/vides: {', '.join(missing)}"); sys.exit(1)
-            else: print("Config Azure OK.")
-        else: print(f"ERREUR FATALE: Section [AZURE] manquante."); sys.exit(1)
-        # Debug Mode
-        try: DEBUG_MODE = config.getboolean('SETTINGS', 'DebugMode', fallback=False)
-        except ValueError: DEBUG_MODE = False; print("AVERTISSEMENT: Valeur DebugMode invalide.")
-        print(f"Mode Debug: {'Activé' if DEBUG_MODE else 'Désactivé'}")
-    except Exception as e: print(f"ERREUR FATALE chargement config: {e}"); traceback.print_exc(); sys.exit(1)
+        s['LOOKUP_CACHE_TTL'] = max(0, config.getint('SETTINGS', 'LookupCacheTTL', fallback=3600))
+        s['LOOKUP_NEGATIVE_TTL'] = max(0, config.getint('SETTINGS', 'LookupNegativeTTL', fallback=60))
+    except ValueError:
+        log.warning("Durées de cache lookup invalides, valeurs par défaut.")
+        s.update(LOOKUP_CACHE_TTL=3600, LOOKUP_NEGATIVE_TTL=60)
+    try: s['HTTP2_ENABLED'] = config.getboolean('SETTINGS', 'Http2', fallback=False)
+    except ValueError: s['HTTP2_ENABLED'] = False; log.warning("Valeur Http2 invalide.")
+    try: s['STREAM_MAX_CLIENTS'] = max(0, config.getint('SETTINGS', 'StreamMaxClients', fallback=20))
+    except ValueError: s['STREAM_MAX_CLIENTS'] = 20; log.warning("Valeur StreamMaxClients invalide.")
+    s['SCHEDULER_MODE'] = config.get('SETTINGS', 'SchedulerMode', fallback='leader').strip().lower()
+    if s['SCHEDULER_MODE'] not in ('leader', 'off'): log.warning("SchedulerMode '%s' invalide, 'leader' utilisé.", s['SCHEDULER_MODE']); s['SCHEDULER_MODE'] = 'leader'
+    s['STARTUP_CHECK'] = config.get('SETTINGS', 'StartupCheck', fallback='verify').strip().lower()
+    if s['STARTUP_CHECK'] not in ('verify', 'strict', 'off'): log.warning("StartupCheck '%s' invalide, 'verify' utilisé.", s['STARTUP_CHECK']); s['STARTUP_CHECK'] = 'verify'
+    return ConfigSnapshot(types.MappingProxyType(salles), tuple(allowed_ips), ip_allowlist,
+                          types.MappingProxyType(azure), types.MappingProxyType(s), mtime)
+
+def apply_config(snapshot):
+    """Publie un instantané: CONFIG et les variables globales historiques (SALLES, ALLOWED_IPS, DEBUG_MODE...)
+    sont remplacés par des références, jamais modifiés en place. Ces globales, publiées une à une, ne sont que
+    des alias pour le démarrage et les journaux: requêtes et cycles lisent un seul instantané (current_config)."""
+    global CONFIG, SALLES, ALLOWED_IPS, IP_ALLOWLIST, AZURE_CONFIG
+    SALLES, ALLOWED_IPS, IP_ALLOWLIST, AZURE_CONFIG = snapshot.salles, snapshot.allowed_ips, snapshot.ip_allowlist, snapshot.azure
+    globals().update(snapshot.settings) # DEBUG_MODE, FETCH_MODE, ... (clés = noms des globales)
+    CONFIG = snapshot
+    setup_logging(snapshot.settings['LOG_LEVEL'], snapshot.settings['LOG_FORMAT'])
+
+def current_config():
+    """Instantané de la requête en cours (fixé à son début, cohérent même si un rechargement survient), sinon CONFIG."""
+    return (g.get('cfg') or CONFIG) if has_request_context() else CONFIG
+
+def load_config():
+    global PARIS_TZ
+    log.info("Chargement config: '%s'...", CONFIG_FILE)
+    # Fuseau horaire
+    try: PARIS_TZ = pytz.timezone('Europe/Paris'); log.info("Fuseau horaire OK: Europe/Paris")
+    except pytz.exceptions.UnknownTimeZoneError: log.critical("ERREUR FATALE: Fuseau 'Europe/Paris' inconnu."); sys.exit(1)
+    try: snapshot = read_config()
+    except ConfigError as e: log.critical("ERREUR FATALE: %s", e); sys.exit(1)
+    except Exception as e: log.critical("ERREUR FATALE chargement config: %s", e, exc_info=True); sys.exit(1)
+    apply_config(snapshot)
+    log.info("Salles OK: %s", list(SALLES.keys()))
+    log.info("IPs OK: %s", list(ALLOWED_IPS) if ALLOWED_IPS else 'Toutes')
+    log.info("Config Azure OK.")
+    log.info("Mode Debug: %s", 'Activé' if DEBUG_MODE else 'Désactivé')
+    log.info("Mode récupération: %s, synchro: %s, corps: %s", FETCH_MODE, SYNC_MODE, FETCH_BODY)
 
 # --- Application Flask ---
 app = Flask(__name__, static_folder='static', template_folder='templates')
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 load_config()
+if STARTUP_CHECK != 'off': check_requirements(strict=STARTUP_CHECK == 'strict')
+startup_mark('config')
 update_lock = threading.Lock()
 
+# --- Métriques (format texte Prometheus, sans dépendance) ---
+# Valeurs propres à chaque processus: sous gunicorn, chaque worker expose les siennes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Metric:
+    """Compteur, jauge ou histogramme étiqueté. 'collect' (optionnel) fournit les valeurs au moment
+    du rendu ({tuple d'étiquettes: valeur}) pour les grandeurs déjà tenues ailleurs (stats token, cache...)."""
+
+    def __init__(self, name, help_text, kind, labels=(), buckets=LATENCY_BUCKETS, collect=None):
+        self.name, self.help, self.kind, self.labels = name, help_text, kind, tuple(labels)
+        self.buckets, self.collect = buckets, collect
+        self._values = {} # étiquettes -> valeur, ou [compte par bucket..., somme, total] pour un histogramme
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(l, '')) for l in self.labels)
+        with self._lock: self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(l, '')) for l in self.labels)
+        with self._lock: self._values[key] = value
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(l, '')) for l in self.labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None: counts = self._values[key] = [0] * (len(self.buckets) + 3) # buckets, +Inf, somme, total
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-2] += value; counts[-1] += 1
+
+    def _series(self, suffix, key, value, extra=''):
+        pairs = [f'{l}="{_metric_escape(v)}"' for l, v in zip(self.labels, key)] + ([extra] if extra else [])
+        return f"{self.name}{suffix}{{{','.join(pairs)}}} {value}" if pairs else f"{self.name}{suffix} {value}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock: values = {k: (list(v) if isinstance(v, list) else v) for k, v in self._values.items()}
+        if self.collect:
+            try: values.update(self.collect())
+            except Exception as e: log.warning("Métrique %s indisponible: %s", self.name, e)
+        for key, value in sorted(values.items()):
+            if self.kind != 'histogram':
+                lines.append(self._series('', key, value)); continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), value[:-2]):
+                cumulative += count
+                lines.append(self._series('_bucket', key, cumulative, f'le="{bound}"'))
+            lines.append(self._series('_sum', key, round(value[-2], 6)))
+            lines.append(self._series('_count', key, value[-1]))
+        return lines
+
+METRICS = []
+
+def _metric_escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_metrics():
+    return '\n'.join(line for m in METRICS for line in m.render()) + '\n'
+
+REFRESH_SECONDS = Metric('teamsrooms_refresh_duration_seconds', "Durée d'un cycle de rafraîchissement des salles.", 'histogram')
+ROOM_FETCH_SECONDS = Metric('teamsrooms_room_fetch_seconds', "Latence de récupération Graph du calendrier d'une salle (mode batch: durée du lot).", 'histogram', ('room',))
+ROOM_FETCH_FAILURES = Metric('teamsrooms_room_fetch_failures_total', "Échecs définitifs de récupération d'une salle.", 'counter', ('room',))
+GRAPH_REQUEST_SECONDS = Metric('teamsrooms_graph_request_duration_seconds', "Latence des requêtes HTTP vers Graph/OAuth.", 'histogram', ('endpoint', 'status'))
+GRAPH_THROTTLED = Metric('teamsrooms_graph_throttled_total', "Réponses 429 de Graph (requêtes et éléments de /$batch).", 'counter', ('endpoint',))
+RETRIES = Metric('teamsrooms_retries_total', "Nouvelles tentatives après erreur.", 'counter', ('function',))
+PROCESS_SECONDS = Metric('teamsrooms_process_meetings_seconds', "Durée de process_meetings par appel.", 'histogram')
+SERIALIZE_SECONDS = Metric('teamsrooms_serialize_seconds', "Durée de sérialisation JSON des réunions.", 'histogram')
+HTTP_REQUEST_SECONDS = Metric('teamsrooms_http_request_duration_seconds', "Latence des requêtes servies par route.", 'histogram', ('route', 'method', 'status'))
+BODY_CACHE = Metric('teamsrooms_body_cache_total', "Corps d'événements: trouvés en cache (hit) ou demandés à Graph (miss).", 'counter', ('result',))
+MEETINGS_DATA_TS = None # Epoch des données réunions installées (écriture du fichier par le leader)
+
+def _graph_endpoint(url):
+    # Étiquette bornée (pas d'email ni d'id dans les séries)
+    if 'login.microsoftonline.com' in url: return 'token'
+    for endpoint in ('$batch', 'calendarView/delta', 'calendarView', 'onlineMeetings', 'events'):
+        if endpoint in url: return endpoint
+    return 'other'
+
 # --- Fonctions Utilitaires ---
+RETRY_AFTER_MAX = 120 # Secondes: plafond d'attente demandé par un Retry-After
+
+def retry_after_delay(exc, default):
+    """Attente avant nouvel essai: Retry-After de la réponse (429/503) si présent, sinon le délai de backoff."""
+    response = getattr(exc, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None else None
+    try: return min(RETRY_AFTER_MAX, max(0, int(value))) if value is not None else default
+    except (TypeError, ValueError): return default
+
 def retry(tries=3, delay=2, backoff=2, allowed_exceptions=(requests.exceptions.RequestException,)):
     def deco_retry(f):
         @wraps(f)
@@ -94,8 +421,10 @@ def retry(tries=3, delay=2, backoff=2, allowed_exceptions=(requests.exceptions.R
                 try:
                     return f(*args, **kwargs)
                 except allowed_exceptions as e:
-                    print(f"Erreur {f.__name__} ({type(e).__name__}): {e}. Retry {mdelay}s ({tries-mtries+1}/{tries})...")
-                    time.sleep(mdelay)
+                    wait = retry_after_delay(e, mdelay)
+                    RETRIES.inc(function=f.__name__)
+                    log.warning("Erreur %s (%s): %s. Retry %ss (%s/%s)...", f.__name__, type(e).__name__, e, wait, tries-mtries+1, tries)
+                    time.sleep(wait)
                     mtries -= 1
                     mdelay *= backoff
             # Dernière tentative
@@ -103,79 +432,298 @@ def retry(tries=3, delay=2, backoff=2, allowed_exceptions=(requests.exceptions.R
         return f_retry
     return deco_retry
 
-def convert_to_paris_time(iso_str):
+# --- Client HTTP Graph (connexions keep-alive partagées) ---
+HTTP_TIMEOUT = (5, 30) # (connexion, lecture) en secondes, pour tous les appels Graph/OAuth
+
+class GraphClient:
+    """Session HTTP partagée par tout le processus: connexions TLS réutilisées (pool keep-alive)
+    vers login.microsoftonline.com et graph.microsoft.com au lieu d'une poignée de main par appel.
+    HTTP/2 optionnel via httpx (pip install httpx[http2]); les réponses restent des requests.Response."""
+
+    def __init__(self, pool_size, http2=False):
+        self.pool_size, self.http2 = pool_size, False
+        self._httpx = None
+        if http2:
+            try:
+                import httpx
+                self._httpx_mod = httpx
+                self._httpx = httpx.Client(http2=True, limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+                self.http2 = True
+            except ImportError:
+                log.warning("Http2 demandé mais httpx[http2] non installé. HTTP/1.1 keep-alive utilisé.")
+        self.session = requests.Session()
+        # Retries transport seulement (connexion refusée/coupée); les statuts 429/5xx restent gérés par @retry
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size,
+                              max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5))
+        self.session.mount('https://', adapter)
+
+    def request(self, method, url, timeout=HTTP_TIMEOUT, cost=1, **kwargs):
+        # cost: requêtes Graph imputées au budget (éléments d'un POST /$batch)
+        endpoint, start, status = _graph_endpoint(url), time.perf_counter(), 'error'
+        GRAPH_BUDGET.spend(cost, time.time())
+        try:
+            if self._httpx is None: response = self.session.request(method, url, timeout=timeout, **kwargs)
+            else: response = self._httpx_request(method, url, timeout, **kwargs)
+            status = response.status_code
+            if status == 429: GRAPH_THROTTLED.inc(endpoint=endpoint)
+            return response
+        finally: GRAPH_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, status=status)
+
+    def get(self, url, **kwargs): return self.request('GET', url, **kwargs)
+    def post(self, url, **kwargs): return self.request('POST', url, **kwargs)
+
+    def _httpx_request(self, method, url, timeout, **kwargs):
+        httpx = self._httpx_mod
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        try:
+            hx = self._httpx.request(method, url, timeout=httpx.Timeout(read, connect=connect), **kwargs)
+        except httpx.TimeoutException as e: raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e: raise requests.exceptions.ConnectionError(str(e))
+        # Adapter en requests.Response: le reste du code (raise_for_status, retry...) est inchangé
+        response = requests.Response()
+        response.status_code, response._content, response.url = hx.status_code, hx.content, str(hx.url)
+        response.headers = requests.structures.CaseInsensitiveDict(hx.headers)
+        response.encoding, response.reason = hx.encoding, hx.reason_phrase
+        return response
+
+# Pool dimensionné sur le parallélisme du rafraîchissement + quelques requêtes web simultanées
+GRAPH = GraphClient(pool_size=min(max(len(SALLES), 1), 8) + 4, http2=HTTP2_ENABLED)
+
+@lru_cache(maxsize=64)
+def graph_timezone(name):
+    """Fuseau d'un champ timeZone Graph (IANA, ex. celui demandé par Prefer: outlook.timezone). UTC si absent ou inconnu."""
+    if not name or name.upper() == 'UTC': return timezone.utc
+    try: return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        log.warning("Fuseau Graph inconnu '%s': heures interprétées en UTC.", name); return timezone.utc
+
+def parse_graph_datetime(iso_str, tz_name=None):
+    """Parse unique d'un dateTime Graph. Retourne (epoch, chaîne ISO Paris) ou None si invalide.
+    tz_name: champ timeZone qui accompagne le dateTime (naïf, exprimé dans ce fuseau)."""
     if not iso_str or not isinstance(iso_str, str): return None
     try:
-        dt = parser.isoparse(iso_str)
-        # Si naive, rendre aware en UTC (standard Graph)
+        try: dt = datetime.fromisoformat(iso_str) # Rapide (C), gère les 7 décimales Graph en 3.11+
+        except ValueError: from dateutil import parser; dt = parser.isoparse(iso_str) # Formats plus exotiques
+        # Si naive: heure locale du fuseau indiqué par Graph (Europe/Paris avec l'en-tête Prefer), UTC par défaut
         if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(PARIS_TZ).isoformat(timespec='seconds')
+            tz = graph_timezone(tz_name)
+            dt = dt.replace(tzinfo=tz) if tz is timezone.utc else tz.localize(dt.replace(tzinfo=None))
+        return int(dt.timestamp()), dt.astimezone(PARIS_TZ).isoformat(timespec='seconds')
     except Exception as e:
-        print(f"ERREUR Conversion Date '{iso_str}': {e}")
+        log.error("ERREUR Conversion Date '%s': %s", iso_str, e)
         return None
 
+def convert_to_paris_time(iso_str):
+    parsed = parse_graph_datetime(iso_str)
+    return parsed[1] if parsed else None
+
+def paris_iso(ts):
+    return datetime.fromtimestamp(ts, PARIS_TZ).isoformat(timespec='seconds')
+
+def meeting_times(meeting):
+    """(début, fin) en epoch d'une réunion traitée; re-parse les chaînes pour un ancien fichier sans startTs/endTs."""
+    if 'startTs' in meeting and 'endTs' in meeting: return meeting['startTs'], meeting['endTs']
+    from dateutil import parser
+    return parser.isoparse(meeting['start']).timestamp(), parser.isoparse(meeting['end']).timestamp()
+
+# Extraction du lien Teams: motifs compilés une fois, recherche limitée autour des occurrences de l'hôte
+TEAMS_HOST = 'teams.microsoft.com'
+TEAMS_JOIN_RE = re.compile(r'https://teams\.microsoft\.com/(?:l/(?:meetup-join|meeting)/|meet/)[a-zA-Z0-9%/:\-\._~\?#\[\]@!$&\'\(\)\*\+,;=]+', re.IGNORECASE)
+SAFELINKS_RE = re.compile(r'https://[a-z0-9.\-]*safelinks\.protection\.outlook\.com/?\?url=([^&"\'<>\s]+)', re.IGNORECASE)
+JOIN_SCAN_BEFORE = 256   # Caractères examinés avant l'hôte (préfixe https:// ou enveloppe SafeLinks)
+JOIN_SCAN_AFTER = 4096   # Caractères examinés après l'hôte (longueur max raisonnable d'un lien)
+JOIN_SCAN_MAX_HITS = 20  # Occurrences de l'hôte examinées au plus par corps
+
+def _clean_join_url(url):
+    # Nettoyer la fin de l'URL trouvée
+    return url.split('<')[0].split('"')[0].split("'")[0].strip()
+
+def find_join_url(content):
+    """Premier lien de réunion Teams dans un corps HTML/texte, liens SafeLinks décodés.
+    Préfiltre par recherche de sous-chaîne (C): un corps sans l'hôte Teams n'exécute aucune regex."""
+    if not content or not isinstance(content, str): return ''
+    pos, hits = content.find(TEAMS_HOST), 0
+    while pos != -1 and hits < JOIN_SCAN_MAX_HITS:
+        hits += 1
+        region = content[max(0, pos - JOIN_SCAN_BEFORE):pos + JOIN_SCAN_AFTER]
+        offset = min(pos, JOIN_SCAN_BEFORE) # Position de l'hôte dans la région
+        match = TEAMS_JOIN_RE.search(region, max(0, offset - 8), offset + JOIN_SCAN_AFTER)
+        if match and match.start() <= offset: return _clean_join_url(match.group(0))
+        # Lien enveloppé (https://xxx.safelinks.protection.outlook.com/?url=https%3A%2F%2Fteams...)
+        for wrapped in SAFELINKS_RE.finditer(region):
+            if wrapped.start() <= offset < wrapped.end():
+                decoded = TEAMS_JOIN_RE.match(unquote(html.unescape(wrapped.group(1))))
+                if decoded: return _clean_join_url(decoded.group(0))
+        pos = content.find(TEAMS_HOST, pos + len(TEAMS_HOST))
+    return ''
+
 def extract_join_url(meeting_data):
     if not meeting_data or not isinstance(meeting_data, dict): return ''
     # 1. onlineMeeting.joinUrl
     online_info = meeting_data.get('onlineMeeting')
     join_url = online_info.get('joinUrl') if isinstance(online_info, dict) else None
-    if join_url and isinstance(join_url, str) and 'teams.microsoft.com' in join_url:
+    if join_url and isinstance(join_url, str) and TEAMS_HOST in join_url:
         return join_url
     # 2. body.content
     body_info = meeting_data.get('body')
     content = body_info.get('content', '') if isinstance(body_info, dict) else ''
-    if content and isinstance(content, str):
-        patterns = [r'https://teams\.microsoft\.com/l/(?:meetup-join|meeting)/[a-zA-Z0-9%/:\-\._~\?#\[\]@!$&\'\(\)\*\+,;=]+']
-        for p in patterns:
-            match = re.search(p, content, re.IGNORECASE)
-            if match:
-                # Nettoyer la fin de l'URL trouvée
-                return match.group(0).split('<')[0].split('"')[0].split("'")[0].strip()
+    return find_join_url(content)
+
+# ID de réunion Teams (9 chiffres ou plus, saisi au kiosque) et code secret, tels qu'imprimés dans l'invitation
+JOIN_ID_LABEL_RE = re.compile(r"(?:Meeting ID|ID de (?:la )?réunion|Besprechungs-ID|ID riunione|ID de reunión)", re.IGNORECASE)
+JOIN_PASSCODE_LABEL_RE = re.compile(r"(?:Passcode|Code secret|Code d'accès|Kenncode|Codice passcode|Código de acceso)", re.IGNORECASE)
+JOIN_ID_VALUE_RE = re.compile(r'[\s:]*((?:\d[ \u00a0]?){9,15})')
+JOIN_PASSCODE_VALUE_RE = re.compile(r'[\s:]*([A-Za-z0-9]{4,16})\b')
+JOIN_URL_ID_RE = re.compile(r'teams\.microsoft\.com/meet/(\d{9,})(?:\?(?:[^#]*&)?p=([A-Za-z0-9]+))?', re.IGNORECASE)
+HTML_TAG_RE = re.compile(r'<[^>]*>')
+JOIN_LABEL_SCAN = 512 # Caractères examinés après un libellé (balises HTML comprises)
+
+def _value_after_label(content, label_re, value_re):
+    for label in label_re.finditer(content):
+        region = html.unescape(HTML_TAG_RE.sub(' ', content[label.end():label.end() + JOIN_LABEL_SCAN]))
+        value = value_re.match(region)
+        if value: return value.group(1)
     return ''
 
+def find_join_details(content):
+    """(ID de réunion numérique sans espaces, code secret) du bloc d'invitation Teams d'un corps, '' si absents."""
+    if not content or not isinstance(content, str) or TEAMS_HOST not in content: return '', ''
+    join_id = _value_after_label(content, JOIN_ID_LABEL_RE, JOIN_ID_VALUE_RE)
+    join_id = re.sub(r'\D', '', join_id)
+    passcode = _value_after_label(content, JOIN_PASSCODE_LABEL_RE, JOIN_PASSCODE_VALUE_RE) if join_id else ''
+    return join_id, passcode
+
+def extract_join_details(meeting_data, join_url=''):
+    """(ID de réunion, code secret): infos tirées du corps (cache), sinon corps présent, sinon lien /meet/<id>?p=."""
+    online_info = meeting_data.get('onlineMeeting')
+    if isinstance(online_info, dict) and online_info.get('joinMeetingId'):
+        return online_info['joinMeetingId'], online_info.get('joinPasscode', '')
+    body_info = meeting_data.get('body')
+    join_id, passcode = find_join_details(body_info.get('content', '') if isinstance(body_info, dict) else '')
+    if join_id: return join_id, passcode
+    url_match = JOIN_URL_ID_RE.search(join_url or '')
+    if url_match: return url_match.group(1), url_match.group(2) or ''
+    return '', ''
+
 # --- Logique Métier (Token, Réunions) ---
 
+# Cache du token OAuth (partagé par tous les threads du processus)
+TOKEN_EXPIRY_MARGIN = 120     # Secondes: token considéré expiré 2 min avant 'expires_in'
+TOKEN_PROACTIVE_WINDOW = 600  # Secondes: rafraîchissement en arrière-plan dans les 10 dernières minutes
+_token_state = (None, 0.0)    # (access_token, expiration monotonic) - tuple remplacé d'un bloc
+_token_lock = threading.Lock()        # Un seul rafraîchissement en vol, les autres attendent
+_token_bg_lock = threading.Lock()     # Un seul rafraîchissement proactif à la fois
+_token_stats_lock = threading.Lock()
+TOKEN_STATS = {'hits': 0, 'misses': 0, 'refreshes': 0, 'background_refreshes': 0, 'failures': 0}
+
+def _token_stat(key):
+    with _token_stats_lock: TOKEN_STATS[key] += 1
+
 @retry(tries=4, delay=3, allowed_exceptions=(requests.exceptions.RequestException,))
-def get_token():
-    tenant_id = AZURE_CONFIG.get('tenantid')
-    client_id = AZURE_CONFIG.get('clientid')
-    client_secret = AZURE_CONFIG.get('clientsecret')
+def fetch_token():
+    """POST vers l'endpoint OAuth. Retourne (access_token, expires_in) ou (None, 0)."""
+    azure = CONFIG.azure # Identifiants d'un même instantané
+    tenant_id = azure.get('tenantid')
+    client_id = azure.get('clientid')
+    client_secret = azure.get('clientsecret')
     if not all([tenant_id, client_id, client_secret]):
-        print("ERREUR INTERNE: Config Azure manquante pour get_token.")
-        return None
+        log.error("ERREUR INTERNE: Config Azure manquante pour get_token.")
+        return None, 0
     url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
     data = {'grant_type': 'client_credentials', 'client_id': client_id, 'client_secret': client_secret, 'scope': 'https://graph.microsoft.com/.default'}
-    response = requests.post(url, data=data, timeout=20)
+    response = GRAPH.post(url, data=data)
     response.raise_for_status() # Le décorateur retry gère les erreurs HTTP ici
     token_response = response.json()
     token = token_response.get('access_token')
     if token:
-        return token
+        try: expires_in = int(token_response.get('expires_in', 3599))
+        except (TypeError, ValueError): expires_in = 3599
+        return token, expires_in
     else:
         # Devrait être rare si raise_for_status est passé
-        print(f"ERREUR Token: Réponse API sans token: {response.text}")
-        return None
+        log.error("ERREUR Token: Réponse API sans token: %s", response.text)
+        return None, 0
+
+def _refresh_token_locked():
+    """Récupère un nouveau token. Doit être appelé avec _token_lock détenu."""
+    global _token_state
+    _token_stat('refreshes')
+    try:
+        token, expires_in = fetch_token()
+    except Exception:
+        _token_stat('failures'); raise
+    if not token:
+        _token_stat('failures'); return None
+    _token_state = (token, time.monotonic() + expires_in)
+    log.debug("Token OAuth rafraîchi (valide %ss).", expires_in)
+    return token
+
+def _background_token_refresh():
+    try:
+        with _token_lock:
+            token, expires_at = _token_state
+            # Un autre thread a pu rafraîchir entre-temps
+            if token and time.monotonic() < expires_at - TOKEN_PROACTIVE_WINDOW: return
+            _token_stat('background_refreshes')
+            _refresh_token_locked()
+    except Exception as e:
+        log.warning("Échec rafraîchissement proactif du token: %s - %s", type(e).__name__, e)
+    finally:
+        _token_bg_lock.release()
+
+def get_token():
+    """Token Graph depuis le cache; rafraîchi une seule fois pour tous les appelants concurrents."""
+    token, expires_at = _token_state
+    now = time.monotonic()
+    if token and now < expires_at - TOKEN_EXPIRY_MARGIN:
+        _token_stat('hits')
+        # Proche de l'expiration: rafraîchir en arrière-plan sans bloquer l'appelant
+        if now >= expires_at - TOKEN_PROACTIVE_WINDOW and _token_bg_lock.acquire(blocking=False):
+            threading.Thread(target=_background_token_refresh, name="TokenRefresher", daemon=True).start()
+        return token
+    with _token_lock:
+        # Re-vérifier: le token a pu être rafraîchi pendant l'attente du verrou
+        token, expires_at = _token_state
+        if token and time.monotonic() < expires_at - TOKEN_EXPIRY_MARGIN:
+            _token_stat('hits'); return token
+        _token_stat('misses')
+        return _refresh_token_locked()
+
+def invalidate_token(token):
+    """Oublie le token s'il est toujours celui en cache (ex: 401 reçu de Graph)."""
+    global _token_state
+    with _token_lock:
+        if _token_state[0] == token: _token_state = (None, 0.0)
+
+def token_stats():
+    with _token_stats_lock: stats = dict(TOKEN_STATS)
+    token, expires_at = _token_state
+    stats['valid_for_s'] = max(0, int(expires_at - time.monotonic())) if token else 0
+    return stats
+
+def meeting_status(start, end, now):
+    # Comparaisons seules: fonctionne avec des epochs (cas normal) comme avec des datetimes
+    if end <= now: return "Passée"
+    if start <= now < end: return "En cours"
+    return "À venir"
 
 def process_meetings(meetings_data, salle_name, current_time_paris):
+    # Champs immuables de l'événement uniquement: le statut dépend de l'heure et est dérivé à la lecture (MeetingStore.with_status)
     processed = []
+    t_start = time.perf_counter()
+    room_prefix = f"{salle_name.lower().replace(' ', '_')}_"
     for m in meetings_data:
         if m.get('isCancelled'): continue
-        start_str = convert_to_paris_time(m.get('start', {}).get('dateTime'))
-        end_str = convert_to_paris_time(m.get('end', {}).get('dateTime'))
-        if start_str is None or end_str is None:
-             if DEBUG_MODE: print(f"AVERTISSEMENT: Réunion '{m.get('subject', 'N/A')}' {salle_name} ignorée (date invalide).")
+        # Chaque horodatage est parsé une seule fois: epoch (tri, statut) + chaîne ISO Paris (affichage)
+        start_dt, end_dt = m.get('start') or {}, m.get('end') or {}
+        start = parse_graph_datetime(start_dt.get('dateTime'), start_dt.get('timeZone'))
+        end = parse_graph_datetime(end_dt.get('dateTime'), end_dt.get('timeZone'))
+        if start is None or end is None:
+             log.debug("Réunion '%s' %s ignorée (date invalide).", m.get('subject', 'N/A'), salle_name)
              continue
-        try:
-            start_dt = parser.isoparse(start_str)
-            end_dt = parser.isoparse(end_str)
-        except Exception as e:
-            print(f"ERREUR parsing date après conversion pour '{m.get('subject')}': {e}")
-            continue # Ignorer si le parsing échoue même après conversion
-        status = "À venir"
-        if end_dt < current_time_paris: status = "Passée"
-        elif start_dt <= current_time_paris < end_dt: status = "En cours"
+        (start_ts, start_str), (end_ts, end_str) = start, end
         join_url = extract_join_url(m)
+        join_id, passcode = extract_join_details(m, join_url) if join_url else ('', '')
         is_online = m.get('isOnlineMeeting', False) or bool(join_url)
         attendees = sorted(list(set(
             a.get('emailAddress', {}).get('address', '').lower()
@@ -184,146 +732,1247 @@ def process_meetings(meetings_data, salle_name, current_time_paris):
         loc = m.get('location', {}).get('displayName', '').strip()
         loc_display = loc if loc else salle_name
         processed.append({
-            'id': f"{salle_name.lower().replace(' ', '_')}_{m.get('id', '')}",
+            'id': f"{room_prefix}{m.get('id', '')}",
             'subject': m.get('subject', 'Réunion sans titre'), # Utiliser un fallback plus clair
-            'start': start_str, 'end': end_str, 'status': status, 'isOnline': is_online,
-            'joinUrl': join_url, 'attendees': attendees, 'salle': salle_name,
-            'location': loc_display,
-            'lastUpdated': current_time_paris.isoformat(timespec='seconds')
+            'start': start_str, 'end': end_str, 'startTs': start_ts, 'endTs': end_ts,
+            'isOnline': is_online,
+            'joinUrl': join_url, 'joinMeetingId': join_id, 'joinPasscode': passcode,
+            'attendees': attendees, 'salle': salle_name,
+            'location': loc_display
         })
+    PROCESS_SECONDS.observe(time.perf_counter() - t_start)
     return processed
 
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_MAX = 20 # Limite Graph: 20 requêtes par POST /$batch
+CALENDAR_SELECT = 'id,changeKey,subject,start,end,isOnlineMeeting,onlineMeeting,attendees,isCancelled,location'
+
+def calendar_view_params(now_paris):
+    # Fenêtre glissante -6h/+36h autour de l'heure courante
+    start_t = (now_paris - timedelta(hours=6)).isoformat()
+    end_t = (now_paris + timedelta(hours=36)).isoformat()
+    # 'body' (souvent des dizaines de Ko par événement) seulement si FetchBody = always
+    select = CALENDAR_SELECT + (',body' if FETCH_BODY == 'always' else '')
+    return {'startDateTime': start_t, 'endDateTime': end_t, '$orderby': 'start/dateTime',
+            '$select': select, '$top': 75}
+
+# Corps récupérés à la demande (FetchBody = auto ou link): une fois par version d'événement (changeKey)
+BODY_CACHE_MAX = 5000
+_body_cache = {} # id Graph -> (changeKey, infos extraites du corps)
+_body_cache_lock = threading.Lock()
+
+def extract_body_info(body):
+    content = body.get('content', '') if isinstance(body, dict) else ''
+    join_id, passcode = find_join_details(content)
+    return {'joinUrl': find_join_url(content), 'joinMeetingId': join_id, 'joinPasscode': passcode}
+
+def _needs_body(ev):
+    # Réunions en ligne dont le lien (et, en mode auto, l'ID de réunion pour /lookupMeeting) ne se déduit pas de onlineMeeting.joinUrl
+    if ev.get('isCancelled') or 'body' in ev or not ev.get('isOnlineMeeting'): return False
+    online_info = ev.get('onlineMeeting')
+    join_url = online_info.get('joinUrl') if isinstance(online_info, dict) else None
+    return not (join_url and (FETCH_BODY == 'link' or JOIN_URL_ID_RE.search(join_url)))
+
+def apply_body_info(ev, info):
+    online_info = dict(ev.get('onlineMeeting') or {})
+    if info.get('joinUrl') and not online_info.get('joinUrl'): online_info['joinUrl'] = info['joinUrl']
+    if info.get('joinMeetingId'): online_info.update(joinMeetingId=info['joinMeetingId'], joinPasscode=info.get('joinPasscode', ''))
+    if online_info: ev['onlineMeeting'] = online_info
+
+def enrich_with_bodies(token, events_by_email):
+    """Complète les événements {email salle: [événements Graph]} avec les infos tirées du corps, pour ceux
+    qui en ont besoin. Cache par changeKey; les corps manquants sont demandés en un seul /$batch."""
+    if FETCH_BODY not in ('auto', 'link'): return
+    missing = {}
+    with _body_cache_lock:
+        for email, events in events_by_email.items():
+            for ev in events:
+                if not _needs_body(ev): continue
+                cached = _body_cache.get(ev.get('id'))
+                if cached and cached[0] == ev.get('changeKey'): apply_body_info(ev, cached[1]); BODY_CACHE.inc(result='hit')
+                else: missing[(email, ev.get('id'))] = ev
+    if not missing: return
+    budget = GRAPH_BUDGET.available(time.time())
+    if len(missing) > budget: # Le reste, absent du cache, sera demandé aux cycles suivants
+        log.info("Corps: %s/%s demandés (budget Graph).", budget, len(missing))
+        missing = dict(list(missing.items())[:budget])
+        if not missing: return
+    BODY_CACHE.inc(len(missing), result='miss')
+    batch_requests = {key: {'method': 'GET', 'url': f"/users/{key[0]}/events/{quote(key[1], safe='')}?$select=body"}
+                      for key in missing}
+    try: responses = graph_batch(token, batch_requests)
+    except Exception as e:
+        log.warning("Récupération des corps impossible (%s: %s).", type(e).__name__, e); return
+    with _body_cache_lock:
+        if len(_body_cache) > BODY_CACHE_MAX: _body_cache.clear()
+        for key, (status, body) in responses.items():
+            if status != 200: continue
+            ev = missing[key]
+            info = extract_body_info((body or {}).get('body'))
+            _body_cache[key[1]] = (ev.get('changeKey'), info)
+            apply_body_info(ev, info)
+    log.debug("Corps récupérés: %s événement(s) en ligne sans joinUrl ou ID de réunion.", len(missing))
+
 @retry(tries=2, delay=5, allowed_exceptions=(requests.exceptions.RequestException,))
 def update_meetings(salle_email, salle_name):
     token = get_token()
     if not token: return [] # Échec token géré
     now_paris = datetime.now(PARIS_TZ)
     headers = {'Authorization': f'Bearer {token}', 'Prefer': f'outlook.timezone="{PARIS_TZ.zone}"'}
-    start_t = (now_paris - timedelta(hours=6)).isoformat()
-    end_t = (now_paris + timedelta(hours=36)).isoformat()
-    url = f"https://graph.microsoft.com/v1.0/users/{salle_email}/calendarView"
-    params = {'startDateTime': start_t, 'endDateTime': end_t, '$orderby': 'start/dateTime',
-              '$select': 'id,subject,start,end,isOnlineMeeting,onlineMeeting,attendees,isCancelled,body,location', '$top': 75}
-    response = requests.get(url, headers=headers, params=params, timeout=30)
+    url = f"{GRAPH_URL}/users/{salle_email}/calendarView"
+    response = GRAPH.get(url, headers=headers, params=calendar_view_params(now_paris))
+    if response.status_code == 401: invalidate_token(token) # Token révoqué/expiré: le prochain appel en obtient un neuf
     # Gérer erreurs client non récupérables (ne pas retry 401, 403, 404...)
     if 400 <= response.status_code < 500 and response.status_code != 429: # 429 peut être retried
-        print(f"ERREUR CLIENT {response.status_code} API pour {salle_name}: {response.text[:100]}...")
+        log.error("ERREUR CLIENT %s API pour %s: %s...", response.status_code, salle_name, response.text[:100])
         return [] # Retourner liste vide, pas d'exception pour retry
     response.raise_for_status() # Gère 5xx et 429 pour retry
     results = response.json().get('value', [])
+    enrich_with_bodies(token, {salle_email: results})
     return process_meetings(results, salle_name, now_paris)
 
-def update_all_meetings():
-    if not SALLES: print("Màj annulée: Pas de salles."); return
-    start_t = time.monotonic()
-    print(f"[{datetime.now(PARIS_TZ).strftime('%H:%M:%S')}] Début màj réunions...")
+# --- Synchronisation incrémentale (calendarView/delta) ---
+DELTA_WINDOW_SLACK_H = 12 # Marge de la fenêtre delta au-delà de +36h (resync complète quand elle est consommée)
+_delta_state = {} # salle -> {'email', 'link' (deltaLink), 'window_end', 'events' {id: réunion traitée}}
+_delta_lock = threading.Lock()
+
+class DeltaTokenRejected(Exception):
+    """Le deltaLink n'est plus accepté par Graph (410 / syncState invalide): resync complète requise."""
+
+def _delta_pages(token, url, params, incremental):
+    """Suit les @odata.nextLink jusqu'au @odata.deltaLink. Retourne (événements, deltaLink)."""
+    headers = {'Authorization': f'Bearer {token}', 'Prefer': f'outlook.timezone="{PARIS_TZ.zone}", odata.maxpagesize=50'}
+    events = []
+    while True:
+        response = GRAPH.get(url, headers=headers, params=params)
+        if response.status_code == 401: invalidate_token(token)
+        if response.status_code == 410 or (incremental and response.status_code == 400):
+            raise DeltaTokenRejected(f"{response.status_code}: {response.text[:100]}")
+        response.raise_for_status()
+        page = response.json()
+        events.extend(page.get('value', []))
+        if page.get('@odata.nextLink'):
+            url, params = page['@odata.nextLink'], None # Le lien contient déjà l'état de pagination
+            continue
+        link = page.get('@odata.deltaLink')
+        if not link: raise requests.exceptions.RequestException("Réponse delta sans deltaLink.")
+        return events, link
+
+@retry(tries=2, delay=5, allowed_exceptions=(requests.exceptions.RequestException,))
+def sync_meetings_delta(salle_email, salle_name):
+    """Comme update_meetings, mais n'applique que les événements ajoutés/modifiés/supprimés depuis le dernier deltaLink."""
+    token = get_token()
+    if not token: return []
+    now_paris = datetime.now(PARIS_TZ)
+    with _delta_lock: state = _delta_state.get(salle_name)
+    # Fenêtre delta ancrée à la dernière resync: la refaire quand l'horizon +36h la dépasse
+    if state and (state['email'] != salle_email or now_paris + timedelta(hours=36) > state['window_end']): state = None
+    changes = None
+    if state:
+        try:
+            changes, link = _delta_pages(token, state['link'], None, True)
+            events, window_end = dict(state['events']), state['window_end']
+        except DeltaTokenRejected as e:
+            log.warning("Delta %s: deltaLink rejeté (%s). Resync complète.", salle_name, e)
+    if changes is None:
+        window_end = now_paris + timedelta(hours=36 + DELTA_WINDOW_SLACK_H)
+        params = {'startDateTime': (now_paris - timedelta(hours=6)).isoformat(), 'endDateTime': window_end.isoformat()}
+        changes, link = _delta_pages(token, f"{GRAPH_URL}/users/{salle_email}/calendarView/delta", params, False)
+        events = {}
+    # Appliquer les changements: seuls les événements ajoutés/modifiés passent par process_meetings
+    prefix = f"{salle_name.lower().replace(' ', '_')}_"
+    updated = []
+    for ev in changes:
+        if '@removed' in ev or ev.get('isCancelled'): events.pop(prefix + ev.get('id', ''), None)
+        else: updated.append(ev)
+    for m in process_meetings(updated, salle_name, now_paris): events[m['id']] = m
+    with _delta_lock:
+        _delta_state[salle_name] = {'email': salle_email, 'link': link, 'window_end': window_end, 'events': events}
+    log.debug("Delta %s: %s changement(s), %s réunion(s) en cache.", salle_name, len(changes), len(events))
+    # Fenêtre glissante -6h/+36h appliquée localement
+    now_ts = now_paris.timestamp()
+    win_start, win_end = now_ts - 6 * 3600, now_ts + 36 * 3600
+    return [m for m in events.values() if not (m['endTs'] < win_start or m['startTs'] > win_end)]
+
+def fetch_room(salle_email, salle_name):
+    start = time.perf_counter()
+    try: return sync_meetings_delta(salle_email, salle_name) if SYNC_MODE == 'delta' else update_meetings(salle_email, salle_name)
+    finally: ROOM_FETCH_SECONDS.observe(time.perf_counter() - start, room=salle_name)
+
+class GraphBatchError(Exception):
+    """Échec d'un POST /$batch. 'partial' garde les réponses déjà reçues ({clé: (status, body)}):
+    les éléments absents ont un résultat inconnu (peut-être appliqués par Graph)."""
+    def __init__(self, message, partial):
+        super().__init__(message)
+        self.partial = partial
+
+def graph_batch(token, batch_requests, tries=3, delay=2, backoff=2, retry_5xx=True):
+    """Envoie des requêtes Graph via POST /$batch (GRAPH_BATCH_MAX par POST).
+    batch_requests: {clé: {'method', 'url' (relative), 'headers'?, 'body'?}}.
+    Retourne {clé: (status, body)}. Les éléments en 429/5xx sont relancés seuls (Retry-After respecté);
+    retry_5xx=False pour les créations: un 5xx a pu être appliqué, le relancer risquerait un doublon.
+    Une erreur d'un POST global lève GraphBatchError avec les réponses connues (repli à la charge de l'appelant)."""
+    pending, results, last = dict(batch_requests), {}, {} # last: dernière réponse des éléments à relancer
+    headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+    attempt, mdelay = 0, delay
+    while pending:
+        attempt += 1
+        keys, to_retry, wait = list(pending), {}, 0
+        for i in range(0, len(keys), GRAPH_BATCH_MAX):
+            chunk = keys[i:i + GRAPH_BATCH_MAX]
+            payload = {'requests': [dict(pending[k], id=str(n)) for n, k in enumerate(chunk)]}
+            try:
+                response = GRAPH.post(f"{GRAPH_URL}/$batch", headers=headers, json=payload, timeout=(HTTP_TIMEOUT[0], 60), cost=len(chunk))
+                if response.status_code == 401: invalidate_token(token)
+                response.raise_for_status()
+            except Exception as e:
+                # Lots suivants jamais envoyés: dernière réponse reçue, sinon 503 (non appliqué). Éléments relancés:
+                # dernière réponse (429/5xx), sinon 503 (absents de la réponse de leur lot). Lot en échec: absent de 'partial'
+                unsent = {k: last.get(k, (503, {'error': {'message': "Non envoyé (échec d'un lot précédent)."}}))
+                          for k in keys[i + GRAPH_BATCH_MAX:]}
+                missing = {k: last.get(k, (503, {'error': {'message': "Absent de la réponse du lot, résultat inconnu."}}))
+                           for k in to_retry}
+                raise GraphBatchError(f"{type(e).__name__}: {e}", {**unsent, **missing, **results}) from e
+            answered = set()
+            for item in response.json().get('responses', []):
+                try: k = chunk[int(item.get('id'))]
+                except (TypeError, ValueError, IndexError): continue
+                answered.add(k)
+                status = item.get('status', 500)
+                if status == 429: GRAPH_THROTTLED.inc(endpoint='$batch item')
+                if (status == 429 or (status >= 500 and retry_5xx)) and attempt < tries:
+                    to_retry[k], last[k] = pending[k], (status, item.get('body'))
+                    try: wait = max(wait, int((item.get('headers') or {}).get('Retry-After', 0)))
+                    except (TypeError, ValueError): pass
+                else:
+                    results[k] = (status, item.get('body'))
+            # Élément absent de la réponse: traité comme une erreur transitoire
+            for k in chunk:
+                if k not in answered:
+                    if attempt < tries: to_retry[k] = pending[k]
+                    else: results[k] = (500, None)
+        pending = to_retry
+        if pending:
+            pause = max(wait, mdelay)
+            log.warning("Batch Graph: %s requête(s) en 429/5xx. Retry %ss (%s/%s)...", len(pending), pause, attempt, tries)
+            time.sleep(pause); mdelay *= backoff
+    return results
+
+def fetch_rooms_threads(rooms):
+    """Chemin historique: un thread et une requête calendarView par salle."""
     all_data, failed = [], []
-    max_w = min(len(SALLES), 8) # Limiter parallélisme
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    max_w = min(len(rooms), 8) # Limiter parallélisme
     with ThreadPoolExecutor(max_workers=max_w) as executor:
-        f_to_room = {executor.submit(update_meetings, email, name): name for name, email in SALLES.items()}
+        # Contexte copié: les logs des threads du pool gardent l'id de corrélation du cycle
+        f_to_room = {executor.submit(contextvars.copy_context().run, fetch_room, email, name): name for name, email in rooms.items()}
         for f in as_completed(f_to_room):
             room = f_to_room[f]
             try:
                 all_data.extend(f.result()) # f.result() lève l'exception si échec final
             except Exception as exc:
-                print(f"ÉCHEC FINAL récupération pour {room}: {type(exc).__name__} - {exc}")
+                log.error("ÉCHEC FINAL récupération pour %s: %s - %s", room, type(exc).__name__, exc)
                 failed.append(room)
-    # Trier avant d'écrire
-    all_data.sort(key=lambda x: parser.isoparse(x['start']))
+    return all_data, failed
+
+def fetch_rooms_batch(rooms):
+    """Toutes les salles en un ou deux POST /$batch. Repli sur fetch_rooms_threads si le batch échoue."""
+    token = get_token()
+    if not token: return [], list(rooms)
+    now_paris = datetime.now(PARIS_TZ)
+    query = urlencode(calendar_view_params(now_paris), safe='$/')
+    prefer = {'Prefer': f'outlook.timezone="{PARIS_TZ.zone}"'}
+    batch_requests = {name: {'method': 'GET', 'url': f"/users/{email}/calendarView?{query}", 'headers': prefer}
+                      for name, email in rooms.items()}
+    start = time.perf_counter()
+    try:
+        responses = graph_batch(token, batch_requests)
+    except Exception as exc:
+        log.error("ERREUR Batch Graph (%s: %s). Repli sur requêtes par salle.", type(exc).__name__, exc)
+        return fetch_rooms_threads(rooms)
+    elapsed = time.perf_counter() - start # Toutes les salles du lot arrivent ensemble
+    for room in rooms: ROOM_FETCH_SECONDS.observe(elapsed, room=room)
+    all_data, failed, ok = [], [], {}
+    for room, (status, body) in responses.items():
+        # Même traitement que update_meetings: 4xx (hors 429) ignorés, 429/5xx épuisés = échec
+        if status == 200:
+            ok[room] = (body or {}).get('value', [])
+        elif 400 <= status < 500 and status != 429:
+            log.error("ERREUR CLIENT %s API pour %s: %s...", status, room, str(body)[:100])
+        else:
+            log.error("ÉCHEC FINAL récupération pour %s: statut %s (batch)", room, status)
+            failed.append(room)
+    enrich_with_bodies(token, {rooms[room]: events for room, events in ok.items()})
+    for room, events in ok.items(): all_data.extend(process_meetings(events, room, now_paris))
+    return all_data, failed
+
+# --- Moteur de rafraîchissement asynchrone (FetchMode = async, nécessite httpx) ---
+async def _fetch_room_async(client, sem, token, salle_email, salle_name, params, tries=3, delay=2, backoff=2):
+    """Équivalent asynchrone d'update_meetings (sans process_meetings): retourne les événements Graph bruts.
+    Les attentes entre essais (Retry-After ou backoff) ne bloquent aucun thread et libèrent le sémaphore."""
+    import asyncio, httpx
+    url = f"{GRAPH_URL}/users/{salle_email}/calendarView"
+    headers = {'Authorization': f'Bearer {token}', 'Prefer': f'outlook.timezone="{PARIS_TZ.zone}"'}
+    mdelay = delay
+    for attempt in range(1, tries + 1):
+        async with sem:
+            start = time.perf_counter()
+            GRAPH_BUDGET.spend(1, time.time()) # Client httpx propre: hors GraphClient.request
+            try:
+                response = await client.get(url, headers=headers, params=params)
+            except httpx.TransportError as e:
+                GRAPH_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint='calendarView', status='error')
+                if attempt == tries: raise requests.exceptions.ConnectionError(f"{type(e).__name__}: {e}")
+                wait = mdelay
+            else:
+                GRAPH_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint='calendarView', status=response.status_code)
+                if response.status_code == 429: GRAPH_THROTTLED.inc(endpoint='calendarView')
+                if response.status_code == 401: invalidate_token(token)
+                # Mêmes règles qu'update_meetings: 4xx (hors 429) ignorés, 429/5xx relancés
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    log.error("ERREUR CLIENT %s API pour %s: %s...", response.status_code, salle_name, response.text[:100])
+                    return []
+                if response.status_code < 400: return response.json().get('value', [])
+                if attempt == tries: raise requests.exceptions.HTTPError(f"{response.status_code} pour {salle_name}")
+                try: wait = min(RETRY_AFTER_MAX, int(response.headers.get('Retry-After', mdelay)))
+                except ValueError: wait = mdelay
+        log.warning("Erreur %s (async, essai %s/%s). Retry %ss...", salle_name, attempt, tries, wait)
+        await asyncio.sleep(wait)
+        mdelay *= backoff
+
+def fetch_rooms_async(rooms):
+    """Toutes les salles en parallèle sur une boucle asyncio, concurrence bornée par ASYNC_CONCURRENCY
+    (indépendante du nombre de threads). Repli sur fetch_rooms_threads si httpx est absent."""
+    try: import httpx
+    except ImportError:
+        log.warning("FetchMode async nécessite httpx (pip install httpx). Repli sur threads.")
+        return fetch_rooms_threads(rooms)
+    import asyncio
+    token = get_token()
+    if not token: return [], list(rooms)
+    now_paris = datetime.now(PARIS_TZ)
+    params = calendar_view_params(now_paris)
+    async def run():
+        sem = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        limits = httpx.Limits(max_connections=ASYNC_CONCURRENCY, max_keepalive_connections=ASYNC_CONCURRENCY)
+        timeout = httpx.Timeout(HTTP_TIMEOUT[1], connect=HTTP_TIMEOUT[0])
+        try: client = httpx.AsyncClient(http2=HTTP2_ENABLED, limits=limits, timeout=timeout)
+        except ImportError: client = httpx.AsyncClient(limits=limits, timeout=timeout) # h2 absent: HTTP/1.1
+        async def timed(name):
+            start = time.perf_counter()
+            try: return await _fetch_room_async(client, sem, token, rooms[name], name, params)
+            finally: ROOM_FETCH_SECONDS.observe(time.perf_counter() - start, room=name)
+        async with client:
+            names = list(rooms)
+            results = await asyncio.gather(*(timed(n) for n in names), return_exceptions=True)
+            return dict(zip(names, results))
+    all_data, failed, ok = [], [], {}
+    for room, result in asyncio.run(run()).items():
+        if isinstance(result, Exception):
+            log.error("ÉCHEC FINAL récupération pour %s: %s - %s", room, type(result).__name__, result)
+            failed.append(room)
+        else: ok[room] = result
+    enrich_with_bodies(token, {rooms[room]: events for room, events in ok.items()})
+    for room, events in ok.items(): all_data.extend(process_meetings(events, room, now_paris))
+    return all_data, failed
+
+# --- Store en mémoire des réunions ---
+THREAD_ID_RE = re.compile(r'19(?::|%3a)meeting_([A-Za-z0-9_\-]+)(?:@|%40)thread\.v2', re.IGNORECASE)
+TIME_BUCKET_S = 3600 # Granularité de l'index temporel (1h)
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class MeetingStore:
+    """Instantané immuable des réunions et de leurs index.
+    Jamais modifié après construction: update_all_meetings en construit un nouveau et remplace
+    MEETING_STORE d'un bloc, les requêtes lisent donc toujours un état cohérent sans verrou."""
+
+    def __init__(self, meetings):
+        self.meetings = meetings
+        self.by_id, self.by_graph_id, self.by_join_url = {}, {}, {}
+        self.by_join_id, self.by_thread = {}, {}
+        self.by_room, self.buckets = {}, {}
+        self.subjects, self.subject_grams = [], {}
+        self.spans = [] # (début, fin) epoch par réunion, None si horaires illisibles
+        for idx, m in enumerate(meetings):
+            mid = m.get('id', '')
+            self.by_id.setdefault(mid, idx)
+            salle = (m.get('salle') or '').lower()
+            prefix = f"{salle.replace(' ', '_')}_"
+            if mid.startswith(prefix): self.by_graph_id.setdefault(mid[len(prefix):], idx)
+            self.by_room.setdefault(salle, []).append(idx)
+            join_url = m.get('joinUrl') or ''
+            if join_url:
+                self.by_join_url.setdefault(join_url, idx)
+                t = THREAD_ID_RE.search(join_url)
+                if t: self.by_thread.setdefault(t.group(1), idx)
+            # ID numérique extrait de l'invitation au rafraîchissement (ou du lien /meet/ pour un ancien fichier):
+            # /lookupMeeting le résout sans appel Graph
+            join_id = m.get('joinMeetingId')
+            if not join_id:
+                j = JOIN_URL_ID_RE.search(join_url)
+                join_id = j.group(1) if j else ''
+            if join_id: self.by_join_id.setdefault(join_id, idx)
+            # Index temporel: la réunion est listée dans chaque tranche d'une heure qu'elle recouvre
+            try:
+                start_ts, end_ts = meeting_times(m)
+                for b in range(int(start_ts // TIME_BUCKET_S), int(end_ts // TIME_BUCKET_S) + 1):
+                    self.buckets.setdefault(b, []).append(idx)
+                self.spans.append((start_ts, end_ts))
+            except Exception: self.spans.append(None)
+            subject = (m.get('subject') or '').lower()
+            self.subjects.append(subject)
+            for g in _trigrams(subject): self.subject_grams.setdefault(g, set()).add(idx)
+        # Intervalles triés par début pour chaque salle: réunion en cours/suivante par bisect
+        self.room_index = {} # salle -> (débuts, fins, indices, fin max cumulée)
+        for salle, idxs in self.by_room.items():
+            spans = sorted((self.spans[i][0], self.spans[i][1], i) for i in idxs if self.spans[i])
+            max_ends, top = [], float('-inf')
+            for _, end_ts, _ in spans: top = max(top, end_ts); max_ends.append(top)
+            self.room_index[salle] = ([s for s, _, _ in spans], [e for _, e, _ in spans], [i for _, _, i in spans], max_ends)
+        self.boundaries = sorted({t for span in self.spans if span for t in span}) # Instants où un statut change
+
+    def __len__(self):
+        return len(self.meetings)
+
+    def for_room(self, salle):
+        return [self.meetings[i] for i in self.by_room.get((salle or '').lower(), [])]
+
+    def with_status(self, now):
+        """Réunions telles que servies: champs stockés + statut dérivé de l'heure de lecture."""
+        return [dict(m, status=meeting_status(*span, now)) if span else m for m, span in zip(self.meetings, self.spans)]
+
+    def next_boundary(self, now):
+        """Prochain début/fin de réunion après 'now' (inf si aucun): les statuts sont stables jusque-là."""
+        i = bisect.bisect_right(self.boundaries, now)
+        return self.boundaries[i] if i < len(self.boundaries) else float('inf')
+
+    def current_and_next(self, salle, now):
+        """(réunion en cours, réunion suivante) d'une salle, None si absente."""
+        starts, ends, idxs, max_ends = self.room_index.get((salle or '').lower(), ((), (), (), ()))
+        i = bisect.bisect_right(starts, now)
+        upcoming = self.meetings[idxs[i]] if i < len(idxs) else None
+        j = i - 1
+        while j >= 0 and max_ends[j] > now: # Aucune réunion plus ancienne ne peut encore être en cours
+            if ends[j] > now: return self.meetings[idxs[j]], upcoming
+            j -= 1
+        return None, upcoming
+
+    def room_now(self, salle, now):
+        """(réunion en cours, suivante, fin de l'occupation continue ou None, prochain début/fin de la salle ou inf)."""
+        current, upcoming = self.current_and_next(salle, now)
+        starts, ends, _, max_ends = self.room_index.get((salle or '').lower(), ((), (), (), ()))
+        i = bisect.bisect_right(starts, now)
+        changes_at, busy_until = starts[i] if i < len(starts) else float('inf'), None
+        j = i - 1
+        while j >= 0 and max_ends[j] > now: # Réunions en cours: la première fin est le prochain changement
+            if ends[j] > now: changes_at, busy_until = min(changes_at, ends[j]), max(busy_until or now, ends[j])
+            j -= 1
+        k = i
+        while busy_until is not None and k < len(starts) and starts[k] <= busy_until: # Réunions enchaînées
+            busy_until = max(busy_until, ends[k]); k += 1
+        return current, upcoming, busy_until, changes_at
+
+    def _room_range(self, salle, from_ts, to_ts):
+        # Bisect sur les débuts puis remontée bornée par la fin max cumulée: seules les candidates sont examinées
+        starts, ends, idxs, max_ends = self.room_index.get((salle or '').lower(), ((), (), (), ()))
+        j, found = bisect.bisect_left(starts, to_ts) - 1, []
+        while j >= 0 and max_ends[j] > from_ts:
+            if ends[j] > from_ts: found.append(idxs[j])
+            j -= 1
+        found.reverse()
+        return found
+
+    def room_busy(self, salle, from_ts, to_ts):
+        """Réunions d'une salle qui recouvrent [from_ts, to_ts[, par début croissant."""
+        return [self.meetings[i] for i in self._room_range(salle, from_ts, to_ts)]
+
+    def query(self, rooms=None, from_ts=None, to_ts=None, text=None):
+        """Indices des réunions des salles 'rooms' (toutes si None) qui recouvrent [from_ts, to_ts[ et dont le
+        sujet contient 'text', triés par (début, id): ordre stable pour la pagination par curseur."""
+        ranged = from_ts is not None or to_ts is not None
+        lo, hi = (float('-inf') if from_ts is None else from_ts), (float('inf') if to_ts is None else to_ts)
+        if rooms is not None:
+            idxs = [i for r in rooms for i in (self._room_range(r, lo, hi) if ranged else self.by_room.get(r, ()))]
+        elif ranged and from_ts is not None and to_ts is not None:
+            idxs = [i for i in self._bucket_range(from_ts, to_ts) if self.spans[i] and self.spans[i][0] < hi and self.spans[i][1] > lo]
+        elif ranged: idxs = [i for i, span in enumerate(self.spans) if span and span[0] < hi and span[1] > lo]
+        else: idxs = range(len(self.meetings))
+        if text: idxs = self._subject_matches(text.lower()).intersection(idxs)
+        return sorted(idxs, key=self.sort_key)
+
+    def sort_key(self, idx):
+        span = self.spans[idx]
+        return (span[0] if span else float('inf'), self.meetings[idx].get('id', ''))
+
+    def _bucket_range(self, from_ts, to_ts):
+        found = set()
+        for b in range(int(from_ts // TIME_BUCKET_S), int(to_ts // TIME_BUCKET_S) + 1):
+            found.update(self.buckets.get(b, ()))
+        return found
+
+    def overlapping(self, from_ts, to_ts):
+        """Réunions qui recouvrent [from_ts, to_ts[ (epoch), dans l'ordre du store."""
+        return [self.meetings[i] for i in sorted(self._bucket_range(from_ts, to_ts))]
+
+    def _subject_matches(self, text):
+        if len(text) < 3: # Trop court pour l'index: balayage des sujets
+            return {i for i, s in enumerate(self.subjects) if text in s}
+        candidates = None
+        for g in _trigrams(text):
+            postings = self.subject_grams.get(g)
+            if not postings: return set()
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates: return set()
+        return {i for i in candidates if text in self.subjects[i]} # Vérification finale (ordre des trigrammes)
+
+    def lookup(self, cleaned_id, raw_id):
+        """Réunion avec joinUrl correspondant à l'ID saisi: index exacts d'abord, puis recherche dans les sujets."""
+        exact = [self.by_id, self.by_graph_id, self.by_join_id, self.by_join_url]
+        for key in (cleaned_id, raw_id):
+            for index in exact:
+                idx = index.get(key)
+                if idx is not None and self.meetings[idx].get('joinUrl'): return self.meetings[idx]
+        t = THREAD_ID_RE.search(raw_id)
+        thread_key = t.group(1) if t else (cleaned_id[8:] if cleaned_id.lower().startswith('meeting_') else cleaned_id)
+        idx = self.by_thread.get(thread_key)
+        if idx is not None: return self.meetings[idx]
+        matches = self._subject_matches(cleaned_id.lower()) | self._subject_matches(raw_id.lower())
+        for idx in sorted(matches):
+            if self.meetings[idx].get('joinUrl'): return self.meetings[idx]
+        return None
+
+class MeetingsPayload:
+    """Réponse /meetings.json pré-calculée pour une version des données:
+    octets bruts, variantes gzip/brotli compressées une seule fois et ETag fort (hash du contenu).
+    Les statuts étant dérivés de l'heure, la réponse n'est valable que jusqu'à 'valid_until' (epoch)."""
+
+    def __init__(self, body, valid_until=float('inf')):
+        self.raw, self.valid_until = body, valid_until
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {'identity': (body, f'"{digest}"'), 'gzip': (gzip.compress(body, 6), f'"{digest}-gz"')}
+        if brotli: self.variants['br'] = (brotli.compress(body, quality=5), f'"{digest}-br"')
+        self.etags = [etag for _, etag in self.variants.values()]
+
+    def response(self, req):
+        headers = {'Cache-Control': 'no-cache, must-revalidate, max-age=0', 'Vary': 'Accept-Encoding'}
+        # Le client possède déjà cette version (quelle que soit la variante): 304 sans corps
+        for etag in self.etags:
+            if req.if_none_match.contains(etag.strip('"')):
+                return Response(status=304, headers=dict(headers, ETag=etag))
+        accepted = req.accept_encodings
+        encoding = next((e for e in ('br', 'gzip') if e in self.variants and accepted.quality(e) > 0), 'identity')
+        body, etag = self.variants[encoding]
+        headers['ETag'] = etag
+        if encoding != 'identity': headers['Content-Encoding'] = encoding
+        return Response(body, mimetype='application/json', headers=headers)
+
+# --- Diffusion des mises à jour (Server-Sent Events) ---
+SSE_HEARTBEAT_S = 15  # Commentaire ': heartbeat' si rien à envoyer (garde la connexion ouverte derrière les proxys)
+SSE_HISTORY = 200     # Diffs conservés pour la reprise via Last-Event-ID
+SSE_RETRY_MS = 5000   # Délai de reconnexion suggéré à EventSource
+_DIFF_IGNORED_KEYS = ('status', 'lastUpdated') # Présents dans les fichiers écrits par les anciennes versions
+
+def meetings_diff(old_store, new_store):
+    """Différences par salle entre deux stores: ids ajoutés/modifiés/supprimés.
+    Les changements de statut ne sont pas diffusés: ils se déduisent des horaires côté client.
+    Retourne None si rien n'a changé."""
+    old_by_id = {m.get('id'): m for m in old_store.meetings}
+    new_by_id = {m.get('id'): m for m in new_store.meetings}
+    rooms, meetings = {}, {}
+    def entry(salle): return rooms.setdefault(salle or '', {'added': [], 'changed': [], 'removed': []})
+    for mid, m in new_by_id.items():
+        old = old_by_id.get(mid)
+        if old is None:
+            entry(m.get('salle'))['added'].append(mid); meetings[mid] = m
+        elif any(old.get(k) != m.get(k) for k in old.keys() | m.keys() if k not in _DIFF_IGNORED_KEYS):
+            entry(m.get('salle'))['changed'].append(mid); meetings[mid] = m
+    for mid, old in old_by_id.items():
+        if mid not in new_by_id: entry(old.get('salle'))['removed'].append(mid)
+    return {'rooms': rooms, 'meetings': meetings} if rooms else None
+
+class MeetingsBroadcaster:
+    """Version courante des données, historique borné des diffs et réveil des flux SSE en attente."""
+
+    def __init__(self, max_clients):
+        self._cond = threading.Condition()
+        self._epoch = format(int(time.time() * 1000), 'x') # Ids uniques par processus: reprise impossible après redémarrage
+        self._history = collections.deque(maxlen=SSE_HISTORY)
+        self._snapshot = b'[]'
+        self.version = 0
+        self.clients, self.max_clients = 0, max_clients
+
+    def publish(self, diff, snapshot):
+        with self._cond:
+            self._snapshot = snapshot
+            if diff is None: return
+            self.version += 1
+            self._history.append((self.version, json.dumps(diff, ensure_ascii=False)))
+            self._cond.notify_all()
+
+    def event_id(self, version):
+        return f"{self._epoch}-{version}"
+
+    def parse_event_id(self, last_id):
+        epoch, _, version = (last_id or '').partition('-')
+        if epoch != self._epoch or not version.isdigit(): return None
+        return int(version)
+
+    def snapshot(self):
+        with self._cond: return self.version, self._snapshot
+
+    def events_after(self, version):
+        """Diffs postérieurs à 'version', ou None si l'historique ne permet pas de combler l'écart."""
+        with self._cond:
+            if version == self.version: return []
+            if version > self.version or not self._history or self._history[0][0] > version + 1: return None
+            return [e for e in self._history if e[0] > version]
+
+    def wait(self, version, timeout):
+        with self._cond: self._cond.wait_for(lambda: self.version != version, timeout)
+        return self.events_after(version)
+
+    def acquire_client(self):
+        with self._cond:
+            if self.clients >= self.max_clients: return False
+            self.clients += 1; return True
+
+    def release_client(self):
+        with self._cond: self.clients -= 1
+
+def _sse_message(event, data, event_id):
+    lines = ''.join(f"data: {line}\n" for line in data.splitlines())
+    return f"id: {event_id}\nevent: {event}\n{lines}\n"
+
+BROADCASTER = MeetingsBroadcaster(STREAM_MAX_CLIENTS)
+
+MEETING_STORE = MeetingStore([])
+MEETINGS_PAYLOAD = None # MeetingsPayload de la version courante (None tant qu'aucune donnée)
+_payload_lock = threading.Lock()
+
+def serialize_meetings(all_data):
+    start = time.perf_counter()
+    body = json.dumps(all_data, ensure_ascii=False, indent=2 if DEBUG_MODE else None).encode('utf-8')
+    SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+    return body
+
+def _build_payload(store, now):
+    # Appelé sous _payload_lock. Contenu identique: même objet, donc même ETag
+    body = serialize_meetings(store.with_status(now))
+    payload = MEETINGS_PAYLOAD
+    if payload is None or payload.raw != body: return MeetingsPayload(body, store.next_boundary(now))
+    payload.valid_until = store.next_boundary(now)
+    return payload
+
+def install_meetings(all_data, body=None, data_ts=None):
+    """Remplace le store en mémoire et la réponse pré-sérialisée (affectations atomiques des références).
+    Retourne le contenu à persister: champs immuables seulement, sans statut."""
+    global MEETING_STORE, MEETINGS_PAYLOAD, MEETINGS_DATA_TS
+    MEETINGS_DATA_TS = data_ts or time.time()
+    if body is None: body = serialize_meetings(all_data)
+    new_store = MeetingStore(all_data)
+    with _payload_lock:
+        old_store = MEETING_STORE
+        payload = _build_payload(new_store, time.time())
+        MEETING_STORE, MEETINGS_PAYLOAD = new_store, payload
+    diff = meetings_diff(old_store, new_store)
+    if diff: refresh_room_snapshots(diff['rooms']) # Seules les salles dont les réunions ont changé
+    BROADCASTER.publish(diff, payload.raw) # Diffs poussés aux kiosques abonnés
+    return body
+
+def current_payload():
+    """Réponse /meetings.json à jour des statuts: resérialisée seulement quand un début/fin de réunion est passé."""
+    global MEETINGS_PAYLOAD
+    payload, now = MEETINGS_PAYLOAD, time.time()
+    if payload is None or now < payload.valid_until: return payload
+    with _payload_lock:
+        if now >= MEETINGS_PAYLOAD.valid_until: MEETINGS_PAYLOAD = _build_payload(MEETING_STORE, now)
+        return MEETINGS_PAYLOAD
+
+# Document /rooms/<salle>/now par salle: octets, ETag et variantes compressées calculés une fois par version,
+# reconstruits quand les réunions de la salle changent ou qu'un début/fin de réunion de la salle est passé
+ROOM_SNAPSHOT_FIELDS = ('id', 'subject', 'start', 'end', 'isOnline', 'joinUrl', 'joinMeetingId')
+_room_snapshots = {} # salle -> MeetingsPayload
+
+def _build_room_snapshot(store, salle, now):
+    # Appelé sous _payload_lock. Contenu identique: même objet, donc même ETag
+    current, upcoming, busy_until, changes_at = store.room_now(salle, now)
+    brief = lambda m: {f: m.get(f) for f in ROOM_SNAPSHOT_FIELDS} if m else None
+    doc = {'room': salle, 'busy': current is not None, 'current': brief(current), 'next': brief(upcoming),
+           'busyUntil': paris_iso(busy_until) if busy_until else None,
+           'freeUntil': None if current else (upcoming or {}).get('start'),
+           'validUntil': paris_iso(changes_at) if changes_at != float('inf') else None}
+    body = json.dumps(doc, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    snapshot = _room_snapshots.get(salle)
+    if snapshot is None or snapshot.raw != body: return MeetingsPayload(body, changes_at)
+    snapshot.valid_until = changes_at
+    return snapshot
+
+def refresh_room_snapshots(rooms):
+    """Précalcule le document des salles 'rooms' sur le store courant (appelé par install_meetings)."""
+    now, salles = time.time(), CONFIG.salles
+    with _payload_lock:
+        for salle in rooms:
+            if salle in salles: _room_snapshots[salle] = _build_room_snapshot(MEETING_STORE, salle, now)
+
+def room_snapshot(salle):
+    """Document courant d'une salle, reconstruit seulement s'il est absent ou qu'un début/fin est passé."""
+    snapshot, now = _room_snapshots.get(salle), time.time()
+    if snapshot is not None and now < snapshot.valid_until: return snapshot
+    with _payload_lock:
+        snapshot = _room_snapshots.get(salle)
+        if snapshot is None or now >= snapshot.valid_until:
+            snapshot = _room_snapshots[salle] = _build_room_snapshot(MEETING_STORE, salle, now)
+        return snapshot
+
+_rooms_now = (None, None) # (ETags des documents de salle assemblés, MeetingsPayload de /rooms/now)
+
+def rooms_now_payload():
+    """Documents de toutes les salles en une réponse, réassemblée seulement si l'un d'eux a changé."""
+    global _rooms_now
+    snapshots = [(salle, room_snapshot(salle)) for salle in sorted(current_config().salles)]
+    key = tuple((salle, snapshot.etags[0]) for salle, snapshot in snapshots)
+    cached_key, payload = _rooms_now
+    if key != cached_key:
+        body = b'{"rooms":[' + b','.join(snapshot.raw for _, snapshot in snapshots) + b']}'
+        payload = MeetingsPayload(body, min((snapshot.valid_until for _, snapshot in snapshots), default=float('inf')))
+        _rooms_now = (key, payload)
+    return payload
+
+def load_meetings_store():
+    """Charge le dernier MEETINGS_FILE écrit (démarrage), pour servir avant la première màj."""
+    try:
+        if reload_meetings_if_changed(): log.info("Store réunions chargé depuis %s: %s réunions.", MEETINGS_FILE, len(MEETING_STORE))
+    except Exception as e: log.warning("Lecture %s impossible au démarrage: %s", MEETINGS_FILE, e)
+
+# --- Planificateur adaptatif par salle ---
+REFRESH_NEAR_WINDOW_S = 900 # Début/fin de réunion dans les 15 min: salle rafraîchie à l'intervalle minimal
+SCHEDULER_TICK_S = 10       # Fréquence d'examen des salles dues
+CHANGE_RATE_ALPHA = 0.5     # Lissage exponentiel de la fréquence de changement
+
+class RoomScheduler:
+    """Échéance de rafraîchissement par salle: les salles qui changent souvent ou dont une réunion
+    commence/finit bientôt sont rafraîchies à REFRESH_MIN_INTERVAL, les salles calmes jusqu'à REFRESH_MAX_INTERVAL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms = {} # salle -> {'next_due', 'interval', 'change_rate', 'signature'}
+
+    def due_rooms(self, rooms, now, limit):
+        """Salles à rafraîchir (les plus en retard d'abord), au plus 'limit'."""
+        with self._lock:
+            due = [(self._rooms.get(r, {}).get('next_due', 0), r) for r in rooms]
+        return [r for next_due, r in sorted(due) if next_due <= now][:limit]
+
+    def mark_due(self, room):
+        with self._lock: self._rooms.setdefault(room, {})['next_due'] = 0
+
+    def forget(self, room):
+        with self._lock: self._rooms.pop(room, None)
+
+    def record(self, room, meetings, now):
+        signature = hashlib.sha1(json.dumps([{k: v for k, v in m.items() if k not in _DIFF_IGNORED_KEYS} for m in meetings],
+                                            sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+        with self._lock:
+            state = self._rooms.setdefault(room, {})
+            changed = 'signature' in state and state['signature'] != signature
+            rate = CHANGE_RATE_ALPHA * changed + (1 - CHANGE_RATE_ALPHA) * state.get('change_rate', 0.0)
+            interval = REFRESH_MAX_INTERVAL - (REFRESH_MAX_INTERVAL - REFRESH_MIN_INTERVAL) * rate
+            upcoming = [t for m in meetings for t in meeting_times(m) if t > now]
+            in_progress = any(s <= now < e for s, e in map(meeting_times, meetings))
+            if in_progress or (upcoming and min(upcoming) - now <= REFRESH_NEAR_WINDOW_S):
+                interval = REFRESH_MIN_INTERVAL
+            elif upcoming: # Se réveiller à temps pour l'approche de la prochaine réunion
+                interval = min(interval, max(REFRESH_MIN_INTERVAL, min(upcoming) - REFRESH_NEAR_WINDOW_S - now))
+            state.update(signature=signature, change_rate=rate, interval=interval, next_due=now + interval)
+
+    def record_failure(self, room, now):
+        with self._lock: self._rooms.setdefault(room, {})['next_due'] = now + REFRESH_MIN_INTERVAL
+
+    def snapshot(self):
+        with self._lock: return {r: dict(s) for r, s in self._rooms.items()}
+
+class RequestBudget:
+    """Budget glissant de requêtes Graph sur 60 secondes, alimenté par chaque appel (GraphClient.request)."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._spent = collections.deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._spent and self._spent[0] <= now - 60: self._spent.popleft()
+
+    def available(self, now):
+        with self._lock:
+            self._expire(now)
+            return max(0, self.per_minute - len(self._spent))
+
+    def spend(self, count, now):
+        with self._lock: self._expire(now); self._spent.extend([now] * count)
+
+ROOM_SCHEDULER = RoomScheduler()
+GRAPH_BUDGET = RequestBudget(GRAPH_BUDGET_PER_MIN)
+
+def write_meetings_file(body):
     # Écriture atomique
     tmp = f"{MEETINGS_FILE}.{os.getpid()}.tmp"
     try:
-        with open(tmp, 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, ensure_ascii=False, indent=2 if DEBUG_MODE else None)
+        with open(tmp, 'wb') as f:
+            f.write(body)
         os.replace(tmp, MEETINGS_FILE) # Renommage atomique
-        d = time.monotonic() - start_t
-        print(f"[{datetime.now(PARIS_TZ).strftime('%H:%M:%S')}] Màj finie ({d:.2f}s). {len(all_data)} réunions écrites.")
-        if failed: print(f"  -> Échec pour: {', '.join(failed)}")
+        return True
     except Exception as e: # Erreur large ici car peut être IOError ou autre
-        print(f"ERREUR CRITIQUE écriture {MEETINGS_FILE}: {e}")
+        log.error("ERREUR CRITIQUE écriture %s: %s", MEETINGS_FILE, e)
         # Nettoyage du fichier temporaire en cas d'erreur d'écriture/remplacement
         if os.path.exists(tmp):
             try:
                 os.remove(tmp)
-                print(f"  -> Fichier temporaire {tmp} supprimé après erreur.")
+                log.info("-> Fichier temporaire %s supprimé après erreur.", tmp)
             except OSError as ose:
-                 print(f"  -> AVERTISSEMENT: Impossible de supprimer {tmp}: {ose}")
+                 log.warning("-> Impossible de supprimer %s: %s", tmp, ose)
+        return False
+
+def update_all_meetings(rooms=None):
+    """Rafraîchit les salles 'rooms' (toutes si None). Les autres salles, et celles en échec, gardent
+    leurs dernières réunions connues avec un statut recalculé localement."""
+    cfg = CONFIG # Un seul instantané pour tout le cycle (rechargement à chaud possible pendant les appels Graph)
+    salles, sync_mode, fetch_mode = cfg.salles, cfg.settings['SYNC_MODE'], cfg.settings['FETCH_MODE']
+    if not salles: log.info("Màj annulée: Pas de salles."); return
+    targets = dict(salles) if rooms is None else {r: salles[r] for r in rooms if r in salles}
+    if not targets: return
+    start_t, fetch_ts = time.monotonic(), time.time()
+    log.info("Début màj réunions (%s/%s salles)...", len(targets), len(salles))
+    # Les deltaLinks sont des URL opaques par salle: la synchro delta passe par le pool de threads
+    if sync_mode == 'delta': fresh, failed = fetch_rooms_threads(targets)
+    elif fetch_mode == 'batch': fresh, failed = fetch_rooms_batch(targets)
+    elif fetch_mode == 'async': fresh, failed = fetch_rooms_async(targets)
+    else: fresh, failed = fetch_rooms_threads(targets)
+    now_ts = time.time() # Requêtes déjà imputées à GRAPH_BUDGET par GraphClient.request
+    by_room = {}
+    for m in fresh: by_room.setdefault(m.get('salle'), []).append(m)
+    for room in targets:
+        if room in failed: ROOM_SCHEDULER.record_failure(room, now_ts); ROOM_FETCH_FAILURES.inc(room=room)
+        else: ROOM_SCHEDULER.record(room, by_room.get(room, []), now_ts)
+    with _store_write_lock: # Lecture-modification-publication du store atomique vis-à-vis de write_through
+        kept = [m for m in MEETING_STORE.meetings
+                if m.get('salle') in salles and (m.get('salle') not in targets or m.get('salle') in failed)]
+        # Réunions tout juste créées que Graph ne renvoie pas encore: conservées jusqu'à confirmation
+        all_data = fresh + kept + pending_written_through(fresh, [r for r in targets if r not in failed], fetch_ts)
+        # Trier avant d'écrire
+        all_data.sort(key=lambda m: meeting_times(m)[0]) # Clé numérique (startTs) calculée dans process_meetings
+        # Sérialisation unique: le même contenu sert la route et le fichier
+        body = install_meetings(all_data) # Store en mémoire à jour même si l'écriture disque échoue
+    REFRESH_SECONDS.observe(time.monotonic() - start_t)
+    if write_meetings_file(body):
+        d = time.monotonic() - start_t
+        log.info("Màj finie (%.2fs). %s réunions écrites.", d, len(all_data),
+                 extra={'duration_s': round(d, 3), 'meetings': len(all_data), 'rooms': len(targets), 'failed': failed})
+        if failed: log.warning("-> Échec pour: %s", ', '.join(failed))
+        log.debug("-> Token: %s", token_stats())
+
+# --- Planification: un seul processus leader interroge Graph, les autres relisent MEETINGS_FILE ---
+FOLLOWER_POLL_S = 5 # Secondes entre deux vérifications du fichier (et tentatives de prise de leadership)
+SCHEDULER_ROLE = None # None (planificateur non démarré), 'leader' ou 'follower'
+_scheduler_started = False
+_scheduler_start_lock = threading.Lock()
+_leader_lock_fd = None # Descripteur gardé ouvert: le verrou est libéré par l'OS si le processus meurt
+
+def try_acquire_leadership():
+    """Verrou fichier exclusif non bloquant à côté de MEETINGS_FILE. True si ce processus devient leader."""
+    global _leader_lock_fd
+    if _leader_lock_fd is not None: return True
+    fd = os.open(f"{MEETINGS_FILE}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl: fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else: msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd); return False
+    _leader_lock_fd = fd
+    return True
+
+_file_signature = None # (mtime_ns, taille) du dernier MEETINGS_FILE chargé
+
+def reload_meetings_if_changed():
+    """Côté follower: recharge le store/la réponse quand le leader a réécrit MEETINGS_FILE."""
+    global _file_signature
+    try: st = os.stat(MEETINGS_FILE)
+    except FileNotFoundError: return False
+    signature = (st.st_mtime_ns, st.st_size)
+    if signature == _file_signature: return False
+    with open(MEETINGS_FILE, 'rb') as f: body = f.read()
+    install_meetings(json.loads(body), body, st.st_mtime) # Âge des données: date d'écriture par le leader
+    _file_signature = signature
+    log.debug("Follower %s: %s rechargé (%s réunions).", os.getpid(), MEETINGS_FILE, len(MEETING_STORE))
+    return True
+
+def run_update_cycle():
+    # Essayer d'acquérir le verrou sans attendre
+    if update_lock.acquire(blocking=False):
+        _log_request_id.set(f"cycle-{uuid.uuid4().hex[:8]}")
+        try:
+            if ADAPTIVE_REFRESH:
+                # Seulement les salles dues, dans la limite du budget Graph (les statuts n'exigent aucun refetch)
+                now = time.time()
+                due = ROOM_SCHEDULER.due_rooms(list(CONFIG.salles), now, GRAPH_BUDGET.available(now))
+                if due: update_all_meetings(due)
+            else:
+                # Exécuter la mise à jour
+                update_all_meetings()
+        finally:
+            # Toujours libérer le verrou
+            update_lock.release()
+    # else: # Optionnel: log si màj sautée car déjà en cours
+    #     log.debug("Màj déjà en cours, sautée par thread périodique.")
 
 def background_updater():
-    print("Thread background_updater démarré."); interval = 60; print(f"Intervalle màj: {interval}s.")
+    global SCHEDULER_ROLE
+    log.info("Thread background_updater démarré (PID %s, mode %s).", os.getpid(), SCHEDULER_MODE); interval = SCHEDULER_TICK_S if ADAPTIVE_REFRESH else 60
+    if ADAPTIVE_REFRESH: log.info("Rafraîchissement adaptatif: %s-%ss par salle, budget %s req/min.", REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL, GRAPH_BUDGET_PER_MIN)
+    else: log.info("Intervalle màj: %ss.", interval)
     time.sleep(5) # Attente initiale
     while True:
         try:
-            # Essayer d'acquérir le verrou sans attendre
-            if update_lock.acquire(blocking=False):
-                try:
-                    # Exécuter la mise à jour
-                    update_all_meetings()
-                finally:
-                    # Toujours libérer le verrou
-                    update_lock.release()
-            # else: # Optionnel: log si màj sautée car déjà en cours
-            #     if DEBUG_MODE: print("Màj déjà en cours, sautée par thread périodique.")
-            # Attendre avant la prochaine tentative
-            time.sleep(interval)
+            # Le leader peut disparaître (worker recyclé): les followers retentent à chaque tour
+            if SCHEDULER_ROLE != 'leader' and SCHEDULER_MODE == 'leader' and try_acquire_leadership():
+                SCHEDULER_ROLE = 'leader'; log.info("PID %s: leader, interroge Graph.", os.getpid())
+            if SCHEDULER_ROLE == 'leader':
+                run_update_cycle()
+                # Attendre avant la prochaine tentative, en prenant en compte les créations signalées par les followers
+                deadline = time.monotonic() + interval
+                while (left := deadline - time.monotonic()) > 0:
+                    time.sleep(min(left, FOLLOWER_POLL_S)); consume_written_through_file()
+            else:
+                reload_meetings_if_changed()
+                time.sleep(FOLLOWER_POLL_S)
         except Exception as e:
             # Logguer l'erreur mais ne pas arrêter le thread
-            print(f"ERREUR MAJEURE thread background: {e}")
-            traceback.print_exc()
-            print("Le thread redémarre après pause...")
+            log.error("ERREUR MAJEURE thread background: %s", e, exc_info=True)
+            log.info("Le thread redémarre après pause...")
             time.sleep(60) # Pause plus longue en cas d'erreur
 
+def start_scheduler():
+    """Démarre le planificateur une fois par processus (python app.py, ou hook gunicorn post_worker_init)."""
+    global _scheduler_started, SCHEDULER_ROLE
+    with _scheduler_start_lock:
+        if _scheduler_started: return
+        _scheduler_started = True
+        SCHEDULER_ROLE = 'follower' # Devient 'leader' si le verrou est obtenu
+    threading.Thread(target=background_updater, name="BackgroundUpdater", daemon=True).start()
+    start_config_watcher()
+
+# --- Rechargement à chaud de config.ini (sans redémarrage: caches et connexions conservés) ---
+CONFIG_POLL_S = 5 # Secondes entre deux vérifications de la date de modification de CONFIG_FILE
+RESTART_ONLY_SETTINGS = ('HTTP2_ENABLED', 'SCHEDULER_MODE', 'STREAM_MAX_CLIENTS') # Lus une seule fois au démarrage (pool de threads du serveur dimensionné avec STREAM_MAX_CLIENTS)
+_config_reload_event = threading.Event() # Positionné par SIGHUP: relecture immédiate
+_config_seen_mtime = None # Dernière version de CONFIG_FILE examinée (appliquée ou refusée)
+_config_watcher_started = False
+
+def refresh_rooms_now(rooms):
+    """Rafraîchit tout de suite les salles données dans un thread (leader uniquement), sans attendre leur échéance."""
+    if SCHEDULER_ROLE == 'follower' or not rooms: return
+    def run():
+        _log_request_id.set(f"rooms-{uuid.uuid4().hex[:8]}")
+        with update_lock: update_all_meetings(rooms)
+    threading.Thread(target=run, name="RoomsRefresh", daemon=True).start()
+
+def apply_room_changes(old_salles, new_salles):
+    """Salles supprimées ou dont l'email a changé: données et états évincés; salles nouvelles/modifiées: rafraîchies.
+    Les autres salles gardent leurs réunions, deltaLinks et échéances."""
+    removed = [r for r in old_salles if new_salles.get(r) != old_salles[r]]
+    added = [r for r in new_salles if old_salles.get(r) != new_salles[r]]
+    if not removed and not added: return
+    log.info("Salles modifiées: -%s +%s", removed, added)
+    for room in removed:
+        ROOM_SCHEDULER.forget(room)
+        with _delta_lock: _delta_state.pop(room, None)
+    if removed and SCHEDULER_ROLE != 'follower': # Les followers relisent le fichier réécrit par le leader
+        with update_lock, _store_write_lock:
+            kept = [m for m in MEETING_STORE.meetings if m.get('salle') not in removed]
+            write_meetings_file(install_meetings(kept))
+    refresh_rooms_now(added)
+
+def reload_config(force=False):
+    """Relit CONFIG_FILE s'il a changé. Invalide: erreur journalisée, configuration courante conservée."""
+    global _config_seen_mtime
+    try: mtime = os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError as e: log.error("Rechargement config impossible: %s", e); return False
+    if not force and mtime in (CONFIG.mtime, _config_seen_mtime): return False
+    _config_seen_mtime = mtime
+    try: snapshot = read_config()
+    except Exception as e:
+        log.error("Rechargement config refusé (%s): configuration courante conservée.", e); return False
+    old = CONFIG
+    ignored = [k for k in RESTART_ONLY_SETTINGS if snapshot.settings[k] != old.settings[k]]
+    if ignored: # Garder les valeurs en vigueur: l'instantané reflète ce qui tourne réellement
+        snapshot = snapshot._replace(settings=types.MappingProxyType(dict(snapshot.settings, **{k: old.settings[k] for k in ignored})))
+        log.warning("Paramètres %s modifiés: pris en compte au prochain redémarrage.", ignored)
+    apply_config(snapshot)
+    # Objets construits au démarrage à partir des réglages
+    GRAPH_BUDGET.per_minute = GRAPH_BUDGET_PER_MIN
+    LOOKUP_CACHE.ttl, LOOKUP_CACHE.negative_ttl = LOOKUP_CACHE_TTL, LOOKUP_NEGATIVE_TTL
+    if snapshot.azure != old.azure: # Identifiants changés: le prochain appel obtient un token neuf
+        invalidate_token(_token_state[0]); LOOKUP_CACHE.clear()
+    if snapshot.allowed_ips != old.allowed_ips:
+        log.info("IPs autorisées: %s", list(snapshot.allowed_ips) if snapshot.allowed_ips else 'Toutes')
+    apply_room_changes(old.salles, snapshot.salles)
+    log.info("Config rechargée depuis %s.", CONFIG_FILE)
+    return True
+
+def config_watcher():
+    while True:
+        forced = _config_reload_event.wait(CONFIG_POLL_S)
+        _config_reload_event.clear()
+        try: reload_config(force=forced)
+        except Exception as e: log.error("ERREUR surveillance config: %s", e, exc_info=True)
+
+def start_config_watcher():
+    """Surveille CONFIG_FILE (date de modification) dans chaque processus servant des requêtes."""
+    global _config_watcher_started
+    with _scheduler_start_lock:
+        if _config_watcher_started: return
+        _config_watcher_started = True
+    threading.Thread(target=config_watcher, name="ConfigWatcher", daemon=True).start()
+
+# --- Écriture directe (write-through) des réunions créées via /api/create-meeting ---
+WRITE_THROUGH_TTL = 300 # Secondes pendant lesquelles une réunion créée absente des réponses Graph reste affichée
+WRITE_THROUGH_FILE = f"{MEETINGS_FILE}.pending" # Réunions créées par un follower, intégrées par le leader
+_store_write_lock = threading.Lock() # Sérialise les lecture-modification-publication de MEETING_STORE
+_written_through = {} # id -> (réunion traitée, epoch d'insertion), jusqu'à ce qu'un cycle la renvoie
+
+def pending_written_through(fresh, refreshed_rooms, fetch_ts):
+    """Appelé sous _store_write_lock par update_all_meetings. Réunions créées à conserver en plus des données
+    fraîches des salles 'refreshed_rooms': celles que Graph n'a pas (encore) renvoyées, pendant WRITE_THROUGH_TTL.
+    Une réunion renvoyée par Graph est confirmée et quitte la liste."""
+    if not _written_through: return []
+    fresh_ids, rooms = {m['id'] for m in fresh}, set(refreshed_rooms)
+    pending = []
+    for mid, (m, inserted) in list(_written_through.items()):
+        if m['salle'] not in rooms: continue
+        if mid in fresh_ids or fetch_ts - inserted > WRITE_THROUGH_TTL: del _written_through[mid]
+        else: pending.append(m)
+    return pending
+
+def write_through(meetings):
+    """Insère des réunions traitées (process_meetings) dans le store et la réponse servie, sans appel Graph.
+    Le leader réécrit aussi MEETINGS_FILE pour que les followers les voient au prochain rechargement."""
+    if not meetings: return
+    now, ids = time.time(), {m['id'] for m in meetings}
+    with _store_write_lock:
+        for m in meetings: _written_through[m['id']] = (m, now)
+        all_data = [m for m in MEETING_STORE.meetings if m.get('id') not in ids] + meetings
+        all_data.sort(key=lambda m: meeting_times(m)[0])
+        body = install_meetings(all_data)
+        if SCHEDULER_ROLE != 'follower': write_meetings_file(body)
+    log.info("Write-through: %s réunion(s) insérée(s) (%s).", len(meetings), ', '.join(sorted({m['salle'] for m in meetings})))
+
+def publish_created_meetings(meetings, rooms=()):
+    """Rend visibles des réunions tout juste créées, puis confirme par un rafraîchissement ciblé de leurs salles
+    (et des salles 'rooms', pour les séries dont les occurrences ne sont connues qu'en relisant calendarView).
+    Sur un follower, le leader (seul à interroger Graph et à écrire MEETINGS_FILE) est prévenu via WRITE_THROUGH_FILE."""
+    now = time.time() # Hors fenêtre -6h/+36h: jamais renvoyée par calendarView, rien à afficher
+    meetings = [m for m in meetings if m['endTs'] > now - 6 * 3600 and m['startTs'] < now + 36 * 3600]
+    write_through(meetings)
+    rooms = sorted({m['salle'] for m in meetings} | set(rooms))
+    if not rooms: return
+    if SCHEDULER_ROLE != 'follower': refresh_rooms_now(rooms); return
+    if SCHEDULER_MODE == 'off': return # Aucun leader: MEETINGS_FILE est alimenté par ailleurs
+    try:
+        with open(WRITE_THROUGH_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'meetings': meetings, 'rooms': rooms}, ensure_ascii=False) + '\n')
+    except OSError as e: log.warning("Signalement au leader impossible (%s): %s attendront le prochain cycle.", e, rooms)
+
+def consume_written_through_file():
+    """Côté leader: intègre les réunions créées par les followers et rafraîchit leurs salles."""
+    claimed = f"{WRITE_THROUGH_FILE}.{os.getpid()}"
+    try: os.replace(WRITE_THROUGH_FILE, claimed) # Les followers recréent le fichier pour les créations suivantes
+    except FileNotFoundError: return
+    except OSError as e: log.debug("%s occupé (%s), repris au prochain tour.", WRITE_THROUGH_FILE, e); return
+    meetings, rooms, salles = [], set(), CONFIG.salles
+    try:
+        with open(claimed, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    meetings.extend(m for m in entry.get('meetings', ()) if m.get('salle') in salles)
+                    rooms.update(r for r in entry.get('rooms', ()) if r in salles)
+                except (ValueError, TypeError, AttributeError): log.warning("Ligne invalide ignorée dans %s.", WRITE_THROUGH_FILE)
+    finally: os.remove(claimed)
+    if meetings or rooms: publish_created_meetings(meetings, rooms)
+
+load_meetings_store()
+startup_mark('store')
+
 # --- Middleware et Routes Flask ---
 
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._\-]{1,64}$')
+MIDDLEWARE_SKIP_PREFIXES = ('/static/',) # Fichiers statiques: ni filtrage, ni id de corrélation, ni métriques
+MIDDLEWARE_SKIP_PATHS = {'/health', '/favicon.ico'}
+
 @app.before_request
 def before_request_middleware():
+    g.cfg = cfg = CONFIG # Instantané unique pour toute la requête (current_config)
     path = request.path
-    # Ne pas appliquer aux fichiers statiques et à la page de diag IP
-    if not path.startswith('/static/') and path != '/ip-check':
-        # Filtrage IP
-        if ALLOWED_IPS and 'ALL' not in ALLOWED_IPS:
-            ip = request.remote_addr # Devrait être la bonne IP via ProxyFix
-            if ip not in ALLOWED_IPS:
-                print(f"Accès REFUSÉ IP: {ip} (Path: {path})")
-                return jsonify({"error": f"IP ({ip}) non autorisée."}), 403 # 403 Forbidden
-        # Logging des requêtes si Debug activé
-        if DEBUG_MODE:
-            print(f"Requête: {request.method} {path} (IP: {request.remote_addr})")
+    if path in MIDDLEWARE_SKIP_PATHS or path.startswith(MIDDLEWARE_SKIP_PREFIXES): return
+    g.request_start = time.perf_counter()
+    # Id de corrélation: repris du proxy (X-Request-ID) s'il est sûr, sinon généré; renvoyé dans la réponse
+    incoming = request.headers.get('X-Request-ID', '')
+    _log_request_id.set(incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex[:16])
+    # Filtrage IP (sauf page de diag IP)
+    if path != '/ip-check':
+        ip = request.remote_addr # Devrait être la bonne IP via ProxyFix
+        if ip not in cfg.ip_allowlist:
+            log.warning("Accès REFUSÉ IP: %s (Path: %s)", ip, path)
+            return jsonify({"error": f"IP ({ip}) non autorisée."}), 403 # 403 Forbidden
+    # Logging des requêtes (niveau DEBUG: aucun coût de formatage sinon)
+    log.debug("Requête: %s %s (IP: %s)", request.method, path, request.remote_addr)
+
+@app.after_request
+def after_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None: # Route (motif, pas le chemin réel) pour garder un nombre de séries borné
+        response.headers['X-Request-ID'] = _log_request_id.get() or ''
+        route = request.url_rule.rule if request.url_rule else 'non_trouvee'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=request.method, status=response.status_code)
+    return response
 
 @app.route('/')
 def index():
     # Passer les noms de salle (triés) au template pour le menu/filtres
-    return render_template('index.html', room_names=sorted(list(SALLES.keys())))
+    return render_template('index.html', room_names=sorted(current_config().salles))
 
 @app.route('/meetings.json')
 def get_meetings_json():
-    # Vérifier si le fichier existe, sinon tenter une màj
-    if not os.path.exists(MEETINGS_FILE):
-        print(f"'{MEETINGS_FILE}' non trouvé, tentative màj immédiate...")
-        # Utiliser le verrou pour la màj manuelle aussi
-        with update_lock:
-            update_all_meetings()
-        # Re-vérifier si le fichier a été créé
-        if not os.path.exists(MEETINGS_FILE):
-            # Si toujours pas là, renvoyer une erreur avec une liste vide
+    # Réponse pré-calculée: aucune lecture disque, resérialisée seulement au passage d'un début/fin de réunion
+    if MEETINGS_PAYLOAD is None:
+        if SCHEDULER_ROLE == 'follower':
+            # Seul le leader interroge Graph: relire le fichier qu'il a pu écrire depuis
+            reload_meetings_if_changed()
+        else:
+            log.info("Aucune donnée réunions en mémoire, tentative màj immédiate...")
+            # Utiliser le verrou pour la màj manuelle aussi
+            with update_lock:
+                if MEETINGS_PAYLOAD is None: update_all_meetings()
+        if MEETINGS_PAYLOAD is None:
+            # Si toujours rien, renvoyer une erreur avec une liste vide
             return jsonify({"error": "Données indisponibles.", "meetings": []}), 404
-    # Servir le fichier avec headers anti-cache
+    return current_payload().response(request)
+
+@app.route('/meetings/stream')
+def meetings_stream():
+    """Flux SSE: instantané complet à la connexion (ou reprise via Last-Event-ID), puis diffs par salle."""
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    if not BROADCASTER.acquire_client():
+        return jsonify({"error": "Trop de flux ouverts, utiliser /meetings.json."}), 503, {'Retry-After': '60'}
+    def generate():
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        version = BROADCASTER.parse_event_id(last_id)
+        events = BROADCASTER.events_after(version) if version is not None else None
+        while True:
+            if events is None: # Première connexion ou écart trop grand: instantané complet
+                version, snapshot = BROADCASTER.snapshot()
+                yield _sse_message('snapshot', snapshot.decode('utf-8'), BROADCASTER.event_id(version))
+            elif not events:
+                yield ": heartbeat\n\n"
+            for v, data in events or ():
+                yield _sse_message('update', data, BROADCASTER.event_id(v)); version = v
+            events = BROADCASTER.wait(version, SSE_HEARTBEAT_S)
+    resp = Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    resp.call_on_close(BROADCASTER.release_client) # Appelé par le serveur WSGI à la déconnexion
+    return resp
+
+# --- Cache de résolution /lookupMeeting ---
+LOOKUP_CACHE_MAX = 4096 # IDs retenus au plus (les plus anciens évincés)
+
+class LookupCache:
+    """Résolutions ID -> joinUrl obtenues de Graph: TTL positif, TTL court pour les ID introuvables,
+    et une seule requête Graph en vol par ID (les requêtes concurrentes attendent son résultat)."""
+
+    def __init__(self, ttl, negative_ttl, max_entries=LOOKUP_CACHE_MAX):
+        self.ttl, self.negative_ttl, self.max_entries = ttl, negative_ttl, max_entries
+        self._entries = collections.OrderedDict() # id -> (joinUrl ou None, expiration monotonic)
+        self._inflight = {} # id -> [Event, résultat]
+        self._lock = threading.Lock()
+        self.stats = {'store_hits': 0, 'hits': 0, 'negative_hits': 0, 'misses': 0, 'coalesced': 0, 'upstream_errors': 0}
+
+    def count(self, key):
+        with self._lock: self.stats[key] += 1
+
+    def resolve(self, key, fetch):
+        """joinUrl pour 'key' ou None. fetch(key) -> (joinUrl ou None, définitif);
+        un résultat non définitif (erreur Graph, timeout) n'est jamais mis en cache."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits' if entry[0] else 'negative_hits'] += 1
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader: flight = self._inflight[key] = [threading.Event(), None]
+            self.stats['misses' if leader else 'coalesced'] += 1
+        if not leader:
+            flight[0].wait(sum(HTTP_TIMEOUT))
+            return flight[1]
+        join_url, definitive = None, False
+        try: join_url, definitive = fetch(key)
+        finally:
+            with self._lock:
+                ttl = self.ttl if join_url else self.negative_ttl
+                if definitive and ttl > 0:
+                    self._entries[key] = (join_url, time.monotonic() + ttl); self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+                elif not definitive: self.stats['upstream_errors'] += 1
+                del self._inflight[key]
+            flight[1] = join_url; flight[0].set()
+        return join_url
+
+    def clear(self):
+        with self._lock: self._entries.clear()
+
+    def snapshot(self):
+        with self._lock: return dict(self.stats, entries=len(self._entries))
+
+LOOKUP_CACHE = LookupCache(LOOKUP_CACHE_TTL, LOOKUP_NEGATIVE_TTL)
+
+def lookup_graph_join_url(cleaned_id):
+    """Recherche Graph onlineMeetings par ID de réunion. (joinUrl ou None, définitif): non définitif si erreur."""
+    log.debug("Interrogation API Graph...")
+    endpoint = 'communications'
     try:
-        resp = send_from_directory('.', MEETINGS_FILE, mimetype='application/json')
-        resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        resp.headers['Pragma'] = 'no-cache'
-        resp.headers['Expires'] = '0'
-        return resp
-    except FileNotFoundError:
-        # Sécurité si le fichier disparaît entre le check et send_from_directory
-        return jsonify({"error": "Fichier meetings.json introuvable.", "meetings": []}), 404
+        token = get_token()
+        if not token: return None, False
+        headers = {"Authorization": f"Bearer {token}", "ConsistencyLevel": "eventual"}
+        filters = [f"joinMeetingIdSettings/joinMeetingId eq '{cleaned_id}'", f"videoTeleconferenceId eq '{cleaned_id}'"]
+        url = f"{GRAPH_URL}/communications/onlineMeetings?$filter={' or '.join(filters)}&$select=joinUrl"
+        log.debug("Essai API %s...", endpoint)
+        response = GRAPH.get(url, headers=headers)
+        if response.status_code == 200:
+            data = response.json().get('value', [])
+            if data and data[0].get("joinUrl"):
+                log.debug("-> TROUVÉ API %s: %s...", endpoint, data[0]['joinUrl'][:40])
+                return data[0]["joinUrl"], True
+            return None, True
+        if response.status_code == 404:
+            log.debug("Non trouvé API %s (404).", endpoint)
+            return None, True
+        if response.status_code == 401: invalidate_token(token)
+        if response.status_code in [401, 403]: log.error("ERREUR Auth/Perms (%s) API %s.", response.status_code, endpoint)
+        else: log.warning("API %s: Statut %s - %s...", endpoint, response.status_code, response.text[:100])
+    except requests.exceptions.Timeout:
+        log.warning("Timeout API %s.", endpoint)
+    except Exception as e:
+        log.warning("Erreur API %s: %s - %s", endpoint, type(e).__name__, e)
+    return None, False
 
 # *** Fonction lookup_meeting (Version Cache + API) ***
 @app.route('/lookupMeeting')
 def lookup_meeting():
     meeting_id_raw = request.args.get('meetingId', '').strip()
     if not meeting_id_raw: return jsonify({'error': "Le paramètre 'meetingId' est requis."}), 400
-    if DEBUG_MODE: print(f"\n--- LOOKUP: Recherche ID brut: '{meeting_id_raw}' ---")
+    log.debug("--- LOOKUP: Recherche ID brut: '%s' ---", meeting_id_raw)
 
     is_numeric_id = bool(re.fullmatch(r'^[\d\s]+$', meeting_id_raw))
     cleaned_id_api = ''
@@ -332,94 +1981,248 @@ def lookup_meeting():
         if len(cleaned_id_api) < 9: return jsonify({'error': "ID numérique fourni trop court."}), 400
     else: cleaned_id_api = ''.join(c for c in meeting_id_raw if c.isalnum() or c in ['-', '_', '='])
     if not cleaned_id_api: return jsonify({'error': "ID fourni invalide après nettoyage."}), 400
-    if DEBUG_MODE: print(f"  ID nettoyé API: '{cleaned_id_api}', Numérique: {is_numeric_id}")
+    log.debug("ID nettoyé API: '%s', Numérique: %s", cleaned_id_api, is_numeric_id)
 
-    # 1. Recherche cache local
-    try:
-        if os.path.exists(MEETINGS_FILE):
-            with open(MEETINGS_FILE, 'r', encoding='utf-8') as f: all_meetings = json.load(f)
-            if DEBUG_MODE: print(f"  Recherche cache ({len(all_meetings)} réunions)...")
-            for meeting in all_meetings:
-                criteria = [meeting.get('id', ''), meeting.get('subject', '').lower(), meeting.get('joinUrl', '')]
-                # Comparaison insensible à la casse pour raw et nettoyé
-                if any(cleaned_id_api.lower() in c.lower() for c in criteria if c) or \
-                   any(meeting_id_raw.lower() in c.lower() for c in criteria if c):
-                    if meeting.get('joinUrl'):
-                        if DEBUG_MODE: print(f"  -> TROUVÉ cache: '{meeting.get('subject')}'")
-                        return jsonify({"joinUrl": meeting['joinUrl']}) # *** Trouvé cache ***
-            if DEBUG_MODE: print("  Non trouvé cache.")
-    except Exception as e: print(f"  Erreur cache: {e}")
-
-    # 2. Recherche API Graph
-    if DEBUG_MODE: print("  Interrogation API Graph...")
-    token = get_token();
-    if not token: return jsonify({'error': "Erreur interne recherche."}), 500
-    headers = {"Authorization": f"Bearer {token}", "ConsistencyLevel": "eventual"}
-    filters = [f"joinMeetingIdSettings/joinMeetingId eq '{cleaned_id_api}'", f"videoTeleconferenceId eq '{cleaned_id_api}'"]
-    filter_query = " or ".join(filters)
-    urls = [f"https://graph.microsoft.com/v1.0/communications/onlineMeetings?$filter={filter_query}&$select=joinUrl"]
-    found_url_api = None
-    for url in urls:
-        if found_url_api: break
-        try:
-            endpoint = url.split('/')[3]
-            if DEBUG_MODE:
-                print(f"  Essai API {endpoint}...")
-            response = requests.get(url, headers=headers, timeout=15)
-            if response.status_code == 200:
-                data = response.json().get('value', [])
-                if data and data[0].get("joinUrl"):
-                    found_url_api = data[0]["joinUrl"]
-                    if DEBUG_MODE: print(f"  -> TROUVÉ API {endpoint}: {found_url_api[:40]}...")
-            elif response.status_code == 404:
-                if DEBUG_MODE:
-                    print(f"  Non trouvé API {endpoint} (404).")
-            elif response.status_code in [401, 403]:
-                print(f"  ERREUR Auth/Perms ({response.status_code}) API {endpoint}. Arrêt.")
-                break # Arrêter la boucle si erreur d'auth/perms
-            else:
-                print(f"  Avertissement API {endpoint}: Statut {response.status_code} - {response.text[:100]}...")
-        except requests.exceptions.Timeout:
-            print(f"  Timeout API {endpoint}.")
-        except Exception as e:
-            print(f"  Erreur API {endpoint}: {type(e).__name__} - {e}")
+    # 1. Recherche cache local (store en mémoire indexé, aucune lecture disque)
+    store = MEETING_STORE
+    log.debug("Recherche cache (%s réunions)...", len(store))
+    meeting = store.lookup(cleaned_id_api, meeting_id_raw)
+    if meeting:
+        log.debug("-> TROUVÉ cache: '%s'", meeting.get('subject'))
+        LOOKUP_CACHE.count('store_hits')
+        return jsonify({"joinUrl": meeting['joinUrl']}) # *** Trouvé cache ***
+    log.debug("Non trouvé cache.")
+
+    # 2. Recherche API Graph (via le cache de résolution: une seule requête en vol par ID)
+    found_url_api = LOOKUP_CACHE.resolve(cleaned_id_api, lookup_graph_join_url)
 
     # 3. Retour résultat
     if found_url_api: return jsonify({"joinUrl": found_url_api}) # *** Trouvé API ***
     else:
-        if DEBUG_MODE: print("  Non trouvé API.")
+        log.debug("Non trouvé API.")
         if is_numeric_id:
-             if DEBUG_MODE: print("  -> ÉCHEC FINAL ID numérique. 404.")
+             log.debug("-> ÉCHEC FINAL ID numérique. 404.")
              return jsonify({'error': f"Réunion introuvable ID numérique '{meeting_id_raw}'."}), 404
         else:
-             if DEBUG_MODE: print("  -> ÉCHEC FINAL ID non-numérique. 404.")
+             log.debug("-> ÉCHEC FINAL ID non-numérique. 404.")
              return jsonify({'error': f"Réunion introuvable ID '{meeting_id_raw}'."}), 404
 
+@app.route('/health')
+def health():
+    # Sonde du répartiteur/orchestrateur: hors filtrage IP, aucun appel Graph ni lecture disque
+    age = round(time.time() - MEETINGS_DATA_TS, 1) if MEETINGS_DATA_TS else None
+    return jsonify({'status': 'ok', 'pid': os.getpid(), 'role': SCHEDULER_ROLE, 'meetings': len(MEETING_STORE), 'data_age_s': age,
+                    'startup_ms': round(STARTUP_SECONDS * 1000, 1)})
+
 @app.route('/ip-check')
 def ip_check():
     ip = request.remote_addr
-    headers = dict(request.headers)
-    data = {'ip_detectee': ip, 'ips_autorisees_config': ALLOWED_IPS, 'headers': headers}
+    headers, allowed_ips = dict(request.headers), list(current_config().allowed_ips)
+    data = {'ip_detectee': ip, 'ips_autorisees_config': allowed_ips, 'headers': headers}
     if 'application/json' in request.headers.get('Accept', ''):
         return jsonify(data)
     else:
         html = f"""<!DOCTYPE html><html><head><title>Diag IP</title><style>body{{font-family:sans-serif}} pre{{background:#eee;padding:10px;border:1px solid #ccc; overflow-x:auto;}}</style></head><body>
                  <h1>Diag IP</h1><p><strong>IP Détectée:</strong> <strong style='color:blue; font-size:1.1em'>{ip}</strong></p>
-                 <p><strong>IPs Autorisées:</strong> {json.dumps(ALLOWED_IPS)}</p>
+                 <p><strong>IPs Autorisées:</strong> {json.dumps(allowed_ips)}</p>
                  <h2>Headers HTTP:</h2><pre>{json.dumps(headers, indent=2)}</pre></body></html>"""
         return Response(html, mimetype='text/html')
 
+# Grandeurs tenues ailleurs, lues au moment du rendu de /metrics
+Metric('teamsrooms_meetings', "Réunions dans le store en mémoire.", 'gauge', collect=lambda: {(): len(MEETING_STORE)})
+Metric('teamsrooms_data_age_seconds', "Âge des données réunions servies.", 'gauge',
+       collect=lambda: {(): round(time.time() - MEETINGS_DATA_TS, 1)} if MEETINGS_DATA_TS else {})
+Metric('teamsrooms_stream_clients', "Flux SSE ouverts.", 'gauge', collect=lambda: {(): BROADCASTER.clients})
+Metric('teamsrooms_token_events_total', "Accès au token OAuth (hits, récupérations, échecs...).", 'counter', ('event',),
+       collect=lambda: {(k,): v for k, v in token_stats().items() if k != 'valid_for_s'})
+Metric('teamsrooms_startup_seconds', "Durée du démarrage de ce processus par phase (imports, config, store, routes).", 'gauge', ('phase',),
+       collect=lambda: {(k,): round(v, 4) for k, v in STARTUP_PHASES.items()})
+Metric('teamsrooms_lookup_cache_total', "Résolutions /lookupMeeting par résultat (store, cache, Graph...).", 'counter', ('result',),
+       collect=lambda: {(k,): v for k, v in LOOKUP_CACHE.snapshot().items() if k != 'entries'})
+
+@app.route('/metrics')
+def metrics():
+    # Format d'exposition texte Prometheus (valeurs de ce processus)
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/stats')
+def api_stats():
+    # Compteurs internes (diagnostic: appels à l'endpoint OAuth, cache de résolution /lookupMeeting, etc.)
+    return jsonify({'token': token_stats(), 'lookup': LOOKUP_CACHE.snapshot()})
+
+# --- Requête filtrée et paginée des réunions (/api/meetings) ---
+MEETING_FIELDS = ('id', 'subject', 'start', 'end', 'startTs', 'endTs', 'status', 'isOnline', 'joinUrl',
+                  'joinMeetingId', 'joinPasscode', 'attendees', 'salle', 'location')
+MEETING_STATUSES = ("Passée", "En cours", "À venir")
+QUERY_DEFAULT_LIMIT, QUERY_MAX_LIMIT = 100, 500
+
+def encode_cursor(key):
+    # Curseur opaque = clé (début, id) de la dernière réunion servie: indépendant des versions du store
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        start_ts, mid = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return float(start_ts), str(mid)
+    except (ValueError, TypeError): return None
+
+def _csv_arg(name):
+    return [v.strip() for v in (request.args.get(name) or '').split(',') if v.strip()]
+
+@app.route('/api/meetings')
+def api_meetings():
+    # Sous-ensemble des réunions servi depuis les index du store: un kiosque ne reçoit que les réunions de sa salle.
+    # Paramètres: room (liste séparée par des virgules), from/to (ISO), status, q (sujet), fields, limit, cursor
+    if MEETINGS_PAYLOAD is None: return jsonify({'error': "Données indisponibles."}), 503
+    rooms = [r.lower() for r in _csv_arg('room')] or None
+    unknown = [r for r in rooms or () if r not in current_config().salles]
+    if unknown: return jsonify({'error': f"Salle(s) inconnue(s): {', '.join(unknown)}"}), 404
+    from_ts = parse_local_datetime(request.args['from']) if request.args.get('from') else None
+    to_ts = parse_local_datetime(request.args['to']) if request.args.get('to') else None
+    if (request.args.get('from') and from_ts is None) or (request.args.get('to') and to_ts is None):
+        return jsonify({'error': "Paramètres from/to invalides (ISO 8601 attendu)."}), 400
+    statuses = set(_csv_arg('status'))
+    fields = _csv_arg('fields') or MEETING_FIELDS
+    invalid = [v for v in statuses if v not in MEETING_STATUSES] + [f for f in fields if f not in MEETING_FIELDS]
+    if invalid: return jsonify({'error': f"Valeurs status/fields invalides: {', '.join(invalid)}"}), 400
+    try: limit = min(max(1, int(request.args.get('limit', QUERY_DEFAULT_LIMIT))), QUERY_MAX_LIMIT)
+    except ValueError: return jsonify({'error': "Paramètre limit invalide."}), 400
+    after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    if request.args.get('cursor') and after is None: return jsonify({'error': "Curseur invalide."}), 400
+    store, now = MEETING_STORE, time.time()
+    idxs = store.query(rooms, from_ts, to_ts, request.args.get('q'))
+    if after: idxs = idxs[bisect.bisect_right([store.sort_key(i) for i in idxs], after):]
+    page, more = [], False
+    for i in idxs:
+        span = store.spans[i]
+        status = meeting_status(*span, now) if span else None
+        if statuses and status not in statuses: continue
+        if len(page) == limit: more = True; break
+        m = dict(store.meetings[i], status=status)
+        page.append((i, {f: m.get(f) for f in fields}))
+    result = {'meetings': [m for _, m in page], 'count': len(page),
+              'nextCursor': encode_cursor(store.sort_key(page[-1][0])) if more else None}
+    # ETag sur le contenu (statuts compris): un kiosque qui revalide reçoit 304 tant que rien n'a changé
+    response = jsonify(result)
+    response.headers['Cache-Control'] = 'no-cache, must-revalidate, max-age=0'
+    response.add_etag()
+    return response.make_conditional(request)
+
+# --- Disponibilités (index par salle du store, sans appel Graph) ---
+AVAILABILITY_MAX_RANGE_S = 7 * 86400
+
+def cached_window(now):
+    """Période [début, fin[ (epoch) couverte par les données en cache: fenêtre calendarView -6h/+36h,
+    moins l'intervalle de rafraîchissement max (salle la moins récemment interrogée)."""
+    return now - 6 * 3600, now + 36 * 3600 - (REFRESH_MAX_INTERVAL if ADAPTIVE_REFRESH else 60)
+
+def parse_local_datetime(value):
+    """Date/heure ISO d'un paramètre de requête (heure de Paris si sans fuseau) -> epoch, None si invalide."""
+    try: dt = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except (ValueError, AttributeError): return None
+    if dt.tzinfo is None: dt = PARIS_TZ.localize(dt)
+    return dt.timestamp()
+
+def busy_entry(m):
+    return {'id': m.get('id'), 'subject': m.get('subject'), 'start': m.get('start'), 'end': m.get('end')}
+
+def room_availability(store, salle, from_ts, to_ts, min_free_s=0):
+    """Occupations et créneaux libres d'une salle sur [from_ts, to_ts[."""
+    busy = store.room_busy(salle, from_ts, to_ts)
+    free, cursor = [], from_ts
+    for m in busy: # Triées par début: les chevauchements sont fusionnés au fil de l'eau
+        start_ts, end_ts = meeting_times(m)
+        if start_ts - cursor >= max(min_free_s, 1): free.append({'start': paris_iso(cursor), 'end': paris_iso(start_ts)})
+        cursor = max(cursor, end_ts)
+    if to_ts - cursor >= max(min_free_s, 1): free.append({'start': paris_iso(cursor), 'end': paris_iso(to_ts)})
+    return {'room': salle, 'available': not busy, 'free': free,
+            'busy': [busy_entry(m) for m in busy]}
+
+@app.route('/rooms/now')
+def get_rooms_now():
+    # Documents /rooms/<salle>/now de toutes les salles en une requête (grille des salles des kiosques)
+    if MEETINGS_PAYLOAD is None: return jsonify({'error': "Données indisponibles."}), 503
+    return rooms_now_payload().response(request)
+
+@app.route('/rooms/<name>/now')
+def get_room_now(name):
+    # Réunion en cours/suivante d'une salle pour son kiosque: quelques centaines d'octets pré-calculés, 304 si inchangés
+    salle = name.strip().lower()
+    if salle not in current_config().salles: return jsonify({'error': f"Salle inconnue: {salle}"}), 404
+    if MEETINGS_PAYLOAD is None: return jsonify({'error': "Données indisponibles."}), 503
+    return room_snapshot(salle).response(request)
+
+@app.route('/api/availability')
+def api_availability():
+    # Créneaux libres/occupés d'une salle (room=) ou de toutes les salles, calculés sur le store en mémoire
+    if MEETINGS_PAYLOAD is None: return jsonify({'error': "Données indisponibles."}), 503
+    now = time.time()
+    from_ts = parse_local_datetime(request.args['from']) if request.args.get('from') else now
+    if request.args.get('to'): to_ts = parse_local_datetime(request.args['to'])
+    elif from_ts is not None: # Par défaut: jusqu'à la fin de la journée (heure de Paris)
+        day = datetime.fromtimestamp(from_ts, PARIS_TZ).date()
+        to_ts = PARIS_TZ.localize(datetime.combine(day + timedelta(days=1), datetime.min.time())).timestamp()
+    if from_ts is None or to_ts is None: return jsonify({'error': "Paramètres from/to invalides (ISO 8601 attendu)."}), 400
+    if to_ts <= from_ts or to_ts - from_ts > AVAILABILITY_MAX_RANGE_S:
+        return jsonify({'error': "Intervalle from/to vide ou trop long (7 jours max)."}), 400
+    try: min_free_s = max(0, int(request.args.get('minutes', 0))) * 60
+    except ValueError: return jsonify({'error': "Paramètre minutes invalide."}), 400
+    room, salles = (request.args.get('room') or '').strip().lower(), current_config().salles
+    if room and room not in salles: return jsonify({'error': f"Salle inconnue: {room}"}), 404
+    win_start, win_end = cached_window(now)
+    store = MEETING_STORE
+    return jsonify({'from': paris_iso(from_ts), 'to': paris_iso(to_ts),
+                    'complete': win_start <= from_ts and to_ts <= win_end, # Sinon hors de la période en cache
+                    'rooms': [room_availability(store, r, from_ts, to_ts, min_free_s) for r in ([room] if room else sorted(salles))]})
+
+def build_event_data(data, room_email, start_iso, end_iso):
+    """Corps Graph d'un événement Teams réservant la salle 'room_email' (dates ISO localisées Paris)."""
+    # Participants: la salle (ressource) et les invités, hors autres salles
+    participants_emails = data.get('participants', [])
+    salle_emails_lower = [email.lower() for email in current_config().salles.values()]
+    attendees_list = [{"emailAddress": {"address": room_email}, "type": "resource"}]
+    for email in participants_emails:
+        if email and '@' in email and email.lower() not in salle_emails_lower:
+            attendees_list.append({"emailAddress": {"address": email}, "type": "required"})
+
+    # Construction du corps de la requête avec les dates ISO localisées
+    event_data = {
+        "subject": data['title'],
+        "start": {
+            "dateTime": start_iso, # Utiliser la date/heure ISO localisée Paris
+            "timeZone": "Europe/Paris" # Garder pour clarté API
+        },
+        "end": {
+            "dateTime": end_iso, # Utiliser la date/heure ISO localisée Paris
+            "timeZone": "Europe/Paris" # Garder pour clarté API
+        },
+        "location": {
+            "displayName": data.get('room', room_email.split('@')[0])
+        },
+        "attendees": attendees_list,
+        "isOnlineMeeting": True,
+        "onlineMeetingProvider": "teamsForBusiness"
+    }
+    return event_data
+
+def local_conflicts(room_name, start_ts, end_ts):
+    """Réunions en cache qui chevauchent le créneau. Vide hors de la période couverte par le cache
+    (Graph reste alors seul juge) ou tant qu'aucune donnée n'est chargée."""
+    win_start, win_end = cached_window(time.time())
+    if not room_name or MEETINGS_PAYLOAD is None or start_ts < win_start or end_ts > win_end: return []
+    return MEETING_STORE.room_busy(room_name, start_ts, end_ts)
+
 @app.route('/api/create-meeting', methods=['POST'])
 def create_meeting():
     data = request.json
     if not data: return jsonify({'error': "Données manquantes"}), 400
-    log.debug(f"API: Données reçues pour création: {data}") # Log les données reçues
+    log.debug("API: Données reçues pour création: %s", data) # Log les données reçues
 
     # Valider champs requis (y compris heure et date séparées si envoyées comme ça)
     # Supposons que le frontend envoie 'date', 'startTime', 'endTime' comme strings
     required_fields = ['title', 'date', 'startTime', 'endTime', 'roomEmail']
     if not all(data.get(f) for f in required_fields):
-         log.error(f"API: Champs manquants pour création: { {f: data.get(f) for f in required_fields} }")
+         log.error("API: Champs manquants pour création: %s", {f: data.get(f) for f in required_fields})
          return jsonify({'error': "Champs requis manquants (title, date, startTime, endTime, roomEmail)"}), 400
 
     token = get_token()
@@ -441,71 +2244,58 @@ def create_meeting():
         # 3. Localiser ces datetimes naifs dans le fuseau de Paris -> objets AWARE
         paris_start_dt = PARIS_TZ.localize(naive_start_dt)
         paris_end_dt = PARIS_TZ.localize(naive_end_dt)
+        if paris_end_dt <= paris_start_dt: return jsonify({'error': "L'heure de fin doit être après l'heure de début."}), 400
 
         # 4. Convertir les datetimes AWARE en chaînes ISO 8601 pour l'API Graph
         #    isoformat() sur un datetime aware inclut l'offset (+02:00)
         start_iso_for_graph = paris_start_dt.isoformat()
         end_iso_for_graph = paris_end_dt.isoformat()
 
-        log.debug(f"API: Dates converties pour Graph: Start='{start_iso_for_graph}', End='{end_iso_for_graph}'")
+        log.debug("API: Dates converties pour Graph: Start='%s', End='%s'", start_iso_for_graph, end_iso_for_graph)
 
     except ValueError as e:
-        log.error(f"API: Erreur de format date/heure reçue: {e}. Reçu: date='{data.get('date')}', start='{data.get('startTime')}', end='{data.get('endTime')}'")
+        log.error("API: Erreur de format date/heure reçue: %s. Reçu: date='%s', start='%s', end='%s'", e, data.get('date'), data.get('startTime'), data.get('endTime'))
         return jsonify({'error': "Format de date ou d'heure invalide."}), 400
     except Exception as e:
-         log.error(f"API: Erreur localisation date/heure: {e}")
+         log.error("API: Erreur localisation date/heure: %s", e)
          return jsonify({'error': "Erreur interne traitement date/heure."}), 500
     # *** FIN CORRECTION FUSEAU HORAIRE ***
 
-    # Construction des participants (inchangée)
     room_email = data['roomEmail']
-    participants_emails = data.get('participants', [])
-    salle_emails_lower = [email.lower() for email in SALLES.values()]
-    attendees_list = [{"emailAddress": {"address": room_email}, "type": "resource"}]
-    for email in participants_emails:
-        if email and '@' in email and email.lower() not in salle_emails_lower:
-            attendees_list.append({"emailAddress": {"address": email}, "type": "required"})
+    room_name = next((name for name, email in current_config().salles.items() if email.lower() == room_email.lower()), None)
 
-    # Construction du corps de la requête avec les dates ISO localisées
-    event_data = {
-        "subject": data['title'],
-        "start": {
-            "dateTime": start_iso_for_graph, # Utiliser la date/heure ISO localisée Paris
-            "timeZone": "Europe/Paris"       # Garder pour clarté API
-        },
-        "end": {
-            "dateTime": end_iso_for_graph,   # Utiliser la date/heure ISO localisée Paris
-            "timeZone": "Europe/Paris"         # Garder pour clarté API
-        },
-        "location": {
-            "displayName": data.get('room', room_email.split('@')[0])
-        },
-        "attendees": attendees_list,
-        "isOnlineMeeting": True,
-        "onlineMeetingProvider": "teamsForBusiness"
-    }
+    # Pré-contrôle local des conflits (store en mémoire): évite l'aller-retour Graph pour un créneau déjà pris
+    conflicts = local_conflicts(room_name, paris_start_dt.timestamp(), paris_end_dt.timestamp())
+    if conflicts:
+        c = conflicts[0]
+        log.info("API: Création refusée, '%s' déjà réservée (%s - %s: %s).", room_name, c.get('start'), c.get('end'), c.get('subject'))
+        return jsonify({'error': "Salle déjà réservée sur ce créneau.", 'conflicts': [busy_entry(m) for m in conflicts]}), 409
 
-    log.info(f"API: Tentative création réunion '{data['title']}' pour '{data['room']}'")
-    if DEBUG_MODE:
-        log.debug(f"API: Données envoyées à Graph: {json.dumps(event_data, indent=2)}")
+    event_data = build_event_data(data, room_email, start_iso_for_graph, end_iso_for_graph)
+
+    log.info("API: Tentative création réunion '%s' pour '%s'", data['title'], data['room'])
+    if log.isEnabledFor(logging.DEBUG): # json.dumps évité hors DEBUG
+        log.debug("API: Données envoyées à Graph: %s", json.dumps(event_data, indent=2))
 
     try:
         # Utiliser un compte organisateur (ici email de salle par simplicité, à revoir)
         organizer_email = room_email
         url = f"https://graph.microsoft.com/v1.0/users/{organizer_email}/calendar/events"
-        response = requests.post(url, headers=headers, json=event_data, timeout=20)
+        response = GRAPH.post(url, headers=headers, json=event_data)
 
         if response.status_code >= 400:
-            log.error(f"API: Erreur Graph {response.status_code} création réunion: {response.text}")
+            log.error("API: Erreur Graph %s création réunion: %s", response.status_code, response.text)
             return jsonify({'error': f"Erreur Graph API: {response.text}"}), response.status_code
 
         meeting_data = response.json()
         join_url = extract_join_url(meeting_data)
 
-        log.info(f"API: Réunion '{meeting_data.get('subject')}' créée avec succès (ID Graph: {meeting_data.get('id')}).")
+        log.info("API: Réunion '%s' créée avec succès (ID Graph: %s).", meeting_data.get('subject'), meeting_data.get('id'))
 
-        # Forcer MAJ cache (optionnel)
-        # threading.Thread(target=update_all_meetings).start() # Lancer en thread pour ne pas bloquer
+        # Visible tout de suite sur les kiosques, puis confirmée par un rafraîchissement de cette seule salle
+        if room_name:
+            try: publish_created_meetings(process_meetings([meeting_data], room_name, datetime.now(PARIS_TZ)))
+            except Exception as e: log.warning("API: Write-through impossible (%s), réunion visible au prochain cycle.", e)
 
         return jsonify({
             'success': True,
@@ -515,28 +2305,180 @@ def create_meeting():
         }), 201
 
     except Exception as e:
-        log.error(f"API: Erreur lors de la création réunion: {e}", exc_info=DEBUG_MODE)
+        log.error("API: Erreur lors de la création réunion: %s", e, exc_info=DEBUG_MODE)
         return jsonify({'error': f"Erreur serveur interne: {e}"}), 500
 
+# --- Réservations groupées et récurrentes (/api/create-meetings) ---
+BULK_MAX_ITEMS = 100 # Éléments par requête (séries comprises, chacune comptant pour un)
+RECURRENCE_MAX_OCCURRENCES = 500
+RECURRENCE_TYPES = ('daily', 'weekly', 'absoluteMonthly')
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+def _bounded_int(value, field, low, high):
+    # Entier (ou chaîne de chiffres) de la requête dans [low, high], sinon ValueError avec un message pour l'appelant
+    if isinstance(value, str) and value.strip().isdigit(): value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high: raise ValueError(f"{field} invalide ({low}-{high}).")
+    return value
+
+def parse_recurrence(rec, first_day):
+    """Motif de récurrence de la requête -> objet 'recurrence' Graph (patternedRecurrence), expansé par Exchange.
+    rec: {'type': daily|weekly|absoluteMonthly, 'interval'?, 'daysOfWeek'? (weekly), 'until' (AAAA-MM-JJ) ou 'occurrences'}.
+    Lève ValueError si invalide. Une fin est obligatoire: pas de réservation de salle sans limite."""
+    if not isinstance(rec, dict): raise ValueError("recurrence doit être un objet.")
+    kind = rec.get('type')
+    if kind not in RECURRENCE_TYPES: raise ValueError(f"recurrence.type invalide ({', '.join(RECURRENCE_TYPES)}).")
+    interval = _bounded_int(rec.get('interval', 1), 'recurrence.interval', 1, 99)
+    pattern = {'type': kind, 'interval': interval}
+    if kind == 'weekly':
+        days = rec.get('daysOfWeek') or [WEEKDAYS[first_day.weekday()]]
+        if not isinstance(days, list) or not all(isinstance(d, str) for d in days): raise ValueError("recurrence.daysOfWeek doit être une liste de jours (monday..sunday).")
+        days = [d.lower() for d in days]
+        if any(d not in WEEKDAYS for d in days): raise ValueError("recurrence.daysOfWeek invalide.")
+        pattern.update(daysOfWeek=days, firstDayOfWeek='monday')
+    elif kind == 'absoluteMonthly': pattern['dayOfMonth'] = first_day.day
+    rng = {'startDate': first_day.isoformat(), 'recurrenceTimeZone': 'Europe/Paris'}
+    if rec.get('until'):
+        try: until = datetime.strptime(rec['until'], '%Y-%m-%d').date()
+        except (ValueError, TypeError): raise ValueError("recurrence.until invalide (AAAA-MM-JJ attendu).")
+        if until < first_day: raise ValueError("recurrence.until antérieure à la date de début.")
+        rng.update(type='endDate', endDate=until.isoformat())
+    elif rec.get('occurrences'):
+        count = _bounded_int(rec['occurrences'], 'recurrence.occurrences', 1, RECURRENCE_MAX_OCCURRENCES)
+        rng.update(type='numbered', numberOfOccurrences=count)
+    else: raise ValueError("recurrence.until ou recurrence.occurrences requis.")
+    return {'pattern': pattern, 'range': rng}
+
+def recurrence_dates(recurrence, last_day):
+    """Dates des occurrences d'une récurrence Graph jusqu'à 'last_day' inclus (même règles qu'Exchange
+    pour les motifs acceptés par parse_recurrence). Sert au contrôle local des conflits, pas à la création."""
+    pattern, rng = recurrence['pattern'], recurrence['range']
+    first = datetime.strptime(rng['startDate'], '%Y-%m-%d').date()
+    if rng['type'] == 'endDate': last_day = min(last_day, datetime.strptime(rng['endDate'], '%Y-%m-%d').date())
+    remaining = rng.get('numberOfOccurrences', float('inf'))
+    week0 = first - timedelta(days=first.weekday())
+    days = {WEEKDAYS.index(d) for d in pattern.get('daysOfWeek', ())}
+    d = first
+    while d <= last_day and remaining > 0:
+        if pattern['type'] == 'daily': match = (d - first).days % pattern['interval'] == 0
+        elif pattern['type'] == 'weekly': match = d.weekday() in days and ((d - week0).days // 7) % pattern['interval'] == 0
+        else: match = d.day == pattern['dayOfMonth'] and ((d.year - first.year) * 12 + d.month - first.month) % pattern['interval'] == 0
+        if match:
+            remaining -= 1
+            yield d
+        d += timedelta(days=1)
+
+def prepare_bulk_item(item):
+    """Valide un élément de /api/create-meetings. Retourne un dict (salle, email, événement Graph, créneaux
+    à contrôler localement en epoch) ou lève ValueError avec un message pour l'appelant."""
+    if not isinstance(item, dict): raise ValueError("Élément invalide (objet attendu).")
+    missing = [f for f in ('title', 'date', 'startTime', 'endTime') if not item.get(f)]
+    if missing: raise ValueError(f"Champs requis manquants ({', '.join(missing)}).")
+    if not all(isinstance(item.get(k) or '', str) for k in ('title', 'room', 'roomEmail')): raise ValueError("title, room et roomEmail doivent être des chaînes.")
+    participants = item.get('participants', [])
+    if not isinstance(participants, list) or not all(isinstance(p, str) for p in participants):
+        raise ValueError("participants doit être une liste d'adresses e-mail.")
+    room_name, salles = (item.get('room') or '').strip().lower(), current_config().salles
+    room_email = item.get('roomEmail') or salles.get(room_name)
+    if not room_email: raise ValueError("Salle inconnue (room ou roomEmail requis).")
+    room_name = next((name for name, email in salles.items() if email.lower() == room_email.lower()), None)
+    try:
+        day = datetime.strptime(item['date'], '%Y-%m-%d').date()
+        start_t, end_t = (datetime.strptime(item[k], '%H:%M').time() for k in ('startTime', 'endTime'))
+    except (ValueError, TypeError): raise ValueError("Format de date ou d'heure invalide.")
+    start_dt, end_dt = PARIS_TZ.localize(datetime.combine(day, start_t)), PARIS_TZ.localize(datetime.combine(day, end_t))
+    if end_dt <= start_dt: raise ValueError("L'heure de fin doit être après l'heure de début.")
+    event = build_event_data(dict(item, room=item.get('room') or room_name or room_email.split('@')[0]),
+                             room_email, start_dt.isoformat(), end_dt.isoformat())
+    duration = end_dt - start_dt
+    if item.get('recurrence'):
+        event['recurrence'] = parse_recurrence(item['recurrence'], day)
+        # Seules les occurrences de la période en cache peuvent être contrôlées localement
+        horizon = datetime.fromtimestamp(cached_window(time.time())[1], PARIS_TZ).date()
+        starts = [PARIS_TZ.localize(datetime.combine(d, start_t)) for d in recurrence_dates(event['recurrence'], horizon)]
+    else: starts = [start_dt]
+    return {'room': room_name, 'roomEmail': room_email, 'event': event,
+            'spans': [(s.timestamp(), (s + duration).timestamp()) for s in starts]}
+
+@app.route('/api/create-meetings', methods=['POST'])
+def create_meetings():
+    """Création groupée: {'meetings': [{title, date, startTime, endTime, room|roomEmail, participants?, recurrence?}],
+    'dryRun'?}. Tous les créneaux sont contrôlés localement (cache et éléments de la même requête) avant un seul
+    envoi Graph /$batch; une série récurrente est créée par Exchange à partir de son motif. Résultat par élément."""
+    data = request.json
+    items = data.get('meetings') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items: return jsonify({'error': "Liste 'meetings' manquante"}), 400
+    if len(items) > BULK_MAX_ITEMS: return jsonify({'error': f"{BULK_MAX_ITEMS} réunions max par requête."}), 400
+    results, ready, claimed = [None] * len(items), {}, {} # claimed: salle -> créneaux acceptés dans cette requête
+    for i, item in enumerate(items):
+        try: prepared = prepare_bulk_item(item)
+        except (ValueError, TypeError, AttributeError) as e: results[i] = {'index': i, 'status': 400, 'error': str(e)}; continue
+        conflicts = [busy_entry(m) for span in prepared['spans'] for m in local_conflicts(prepared['room'], *span)]
+        own = [j for j, start_ts, end_ts in claimed.get(prepared['room'], ())
+               if any(s < end_ts and start_ts < e for s, e in prepared['spans'])]
+        if conflicts or own:
+            results[i] = {'index': i, 'status': 409, 'error': "Salle déjà réservée sur ce créneau.", 'conflicts': conflicts}
+            if own: results[i]['conflictsWithItems'] = own
+            continue
+        if prepared['room']: claimed.setdefault(prepared['room'], []).extend((i, *span) for span in prepared['spans'])
+        ready[i] = prepared
+    log.info("API: Création groupée: %s réunion(s) valides sur %s.", len(ready), len(items))
+    if ready and not data.get('dryRun'):
+        token = get_token()
+        if not token: return jsonify({'error': "Erreur Auth Graph."}), 500
+        batch_requests = {i: {'method': 'POST', 'url': f"/users/{p['roomEmail']}/calendar/events",
+                              'headers': {'Content-Type': 'application/json'}, 'body': p['event']} for i, p in ready.items()}
+        try: responses = graph_batch(token, batch_requests, retry_5xx=False)
+        except Exception as e:
+            # Réponses des lots déjà traités conservées: seules les autres créations ont un résultat inconnu
+            log.error("API: Batch de création en échec: %s", e, exc_info=DEBUG_MODE)
+            unknown = (502, {'error': {'message': f"Batch Graph en échec, résultat inconnu (vérifier avant de relancer): {e}"}})
+            responses = {**{i: unknown for i in ready}, **getattr(e, 'partial', {})}
+        created, series_rooms, now_paris = [], set(), datetime.now(PARIS_TZ)
+        for i, (status, body) in responses.items():
+            body = body or {}
+            if status >= 400:
+                results[i] = {'index': i, 'status': status, 'error': (body.get('error') or {}).get('message', f"Erreur Graph {status}")}
+                continue
+            results[i] = {'index': i, 'status': 201, 'id': body.get('id'), 'start': (body.get('start') or {}).get('dateTime'),
+                          'end': (body.get('end') or {}).get('dateTime')}
+            room = ready[i]['room']
+            if not room: continue
+            # Série: l'objet renvoyé est le maître, les occurrences arrivent par le rafraîchissement ciblé
+            if body.get('recurrence'): series_rooms.add(room)
+            else: created.extend(process_meetings([body], room, now_paris))
+        if created or series_rooms:
+            try: publish_created_meetings(created, series_rooms)
+            except Exception as e: log.warning("API: Write-through impossible (%s), réunions visibles au prochain cycle.", e)
+    elif ready:
+        for i in ready: results[i] = {'index': i, 'status': 200, 'valid': True}
+    ok = sum(1 for r in results if r['status'] < 400)
+    if data.get('dryRun'): return jsonify({'results': results, 'created': 0, 'failed': len(items) - ok}), 200 if ok == len(items) else 207
+    log.info("API: Création groupée terminée: %s/%s.", ok, len(items))
+    return jsonify({'results': results, 'created': ok, 'failed': len(items) - ok}), 201 if ok == len(items) else 207
+
+startup_mark('routes')
+STARTUP_SECONDS = time.perf_counter() - _STARTUP_T0
+log.info("Module chargé en %.0f ms (%s)", STARTUP_SECONDS * 1000, ', '.join(f"{k} {v * 1000:.0f}" for k, v in STARTUP_PHASES.items()),
+         extra={'startup_ms': round(STARTUP_SECONDS * 1000, 1)})
+
 # --- Exécution Principale ---
 if __name__ == '__main__':
-    print("-" * 60); print(" >>> Démarrage Serveur Salles Teams <<<"); print("-" * 60)
-    updater = threading.Thread(target=background_updater, name="BackgroundUpdater", daemon=True)
-    updater.start()
+    log.info(">>> Démarrage Serveur Salles Teams <<<")
+    start_scheduler()
+    # kill -HUP <pid>: relecture immédiate de config.ini (sous gunicorn, SIGHUP est géré par le maître)
+    if hasattr(signal, 'SIGHUP'): signal.signal(signal.SIGHUP, lambda signum, frame: _config_reload_event.set())
     server_port = int(os.environ.get('PORT', 5001))
-    print(f"Serveur prêt et écoute sur http://0.0.0.0:{server_port}")
-    print(f"Mode Debug: {DEBUG_MODE}, IPs Autorisées: {ALLOWED_IPS}, Salles: {list(SALLES.keys())}")
-    print("-" * 60)
+    log.info("Serveur prêt et écoute sur http://0.0.0.0:%s", server_port)
+    log.info("Mode Debug: %s, IPs Autorisées: %s, Salles: %s", DEBUG_MODE, ALLOWED_IPS, list(SALLES.keys()))
     try:
         from waitress import serve
-        print(f"Utilisation de Waitress (prod-like server)...")
-        serve(app, host='0.0.0.0', port=server_port, threads=10)
+        log.info("Utilisation de Waitress (prod-like server)...")
+        serve(app, host='0.0.0.0', port=server_port, threads=10 + STREAM_MAX_CLIENTS) # Flux SSE en plus des requêtes
     except ImportError:
-        print("(!) Waitress non trouvé. Utilisation serveur dev Flask (NON PROD).")
-        print("Pour installer Waitress: pip install waitress")
+        log.warning("Waitress non trouvé. Utilisation serveur dev Flask (NON PROD).")
+        log.warning("Pour installer Waitress: pip install waitress")
         app.run(host='0.0.0.0', port=server_port, debug=False)
     except Exception as e:
-        print(f"\n!!! ERREUR FATALE Démarrage Serveur: {e} !!!")
-        traceback.print_exc()
+        log.critical("ERREUR FATALE Démarrage Serveur: %s", e, exc_info=True)
         sys.exit(1)
-    print("Serveur arrêté.")
\ No newline at end of file
+    log.info("Serveur arrêté.")
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Configuration gunicorn, chargée automatiquement depuis le répertoire courant (Procfile: gunicorn app:app)
+import os
+
+# Threads par worker: les flux SSE /meetings/stream occupent chacun un thread
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+def post_worker_init(worker):
+    # Chaque worker démarre le planificateur: un seul (verrou meetings.json.lock) interroge Graph,
+    # les autres rechargent meetings.json quand il change
+    import app
+    app.start_scheduler()
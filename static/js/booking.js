@@ -375,55 +375,41 @@ const BookingSystem = {
     }
     
     try {
-      // Récupérer les réunions du jour
-      const apiUrl = window.API_URLS && window.API_URLS.GET_MEETINGS 
-        ? window.API_URLS.GET_MEETINGS 
-        : '/meetings.json';
+      // Disponibilité calculée par le serveur sur son index par salle (pas de téléchargement de toutes les réunions)
+      const apiUrl = window.API_URLS && window.API_URLS.GET_AVAILABILITY
+        ? window.API_URLS.GET_AVAILABILITY
+        : '/api/availability';
+      const params = new URLSearchParams({
+        room: selectedRoom,
+        from: `${selectedDate}T${startTime}`,
+        to: `${selectedDate}T${endTime}`
+      });
       
-      // Ajouter un timestamp pour éviter le cache
-      const cacheBust = `?t=${Date.now()}_${Math.random().toString(36).substring(2, 10)}`;
-      const response = await fetch(`${apiUrl}${cacheBust}`);
+      const response = await fetch(`${apiUrl}?${params}`, { cache: 'no-cache' });
       
       if (!response.ok) {
         throw new Error(`Erreur HTTP: ${response.status}`);
       }
       
-      const meetings = await response.json();
-      
-      // Vérifier les conflits
-      let isAvailable = true;
-      let conflictingMeeting = null;
-      
-      // Normaliser le nom de la salle pour la comparaison
-      const normalizedRoomName = selectedRoom.toLowerCase().trim();
+      const availability = await response.json();
+      const roomAvailability = availability.rooms[0];
       
-      // Filtrer les réunions de la même salle
-      const roomMeetings = meetings.filter(m => {
-        const meetingSalle = (m.salle || '').toLowerCase().trim();
-        return meetingSalle === normalizedRoomName || 
-               meetingSalle.includes(normalizedRoomName) || 
-               normalizedRoomName.includes(meetingSalle);
-      });
-      
-      if (this.debug) console.log(`Vérification de disponibilité pour ${selectedRoom}: ${roomMeetings.length} réunions trouvées`);
+      // Réunions de la salle qui chevauchent le créneau demandé
+      const isAvailable = roomAvailability.available;
+      const conflictingMeeting = roomAvailability.busy[0] || null;
       
-      // Vérifier chaque réunion pour un conflit
-      for (const meeting of roomMeetings) {
-        const meetingStart = new Date(meeting.start);
-        const meetingEnd = new Date(meeting.end);
-        
-        // Vérifier si les plages horaires se chevauchent
-        if ((startDateTime >= meetingStart && startDateTime < meetingEnd) || 
-            (endDateTime > meetingStart && endDateTime <= meetingEnd) ||
-            (startDateTime <= meetingStart && endDateTime >= meetingEnd)) {
-          isAvailable = false;
-          conflictingMeeting = meeting;
-          break;
-        }
-      }
+      if (this.debug) console.log(`Vérification de disponibilité pour ${selectedRoom}: ${roomAvailability.busy.length} conflit(s)`);
       
       // Afficher le résultat
-      if (isAvailable) {
+      if (isAvailable && !availability.complete) {
+        // Créneau hors de la période synchronisée par le serveur: aucune réunion connue ne prouve qu'il est libre
+        availabilityDiv.innerHTML = `
+          <div class="unverified">
+            <i class="fas fa-question-circle"></i> 
+            Disponibilité non vérifiable à cette date (contrôlée par Exchange à la réservation)
+          </div>
+        `;
+      } else if (isAvailable) {
         availabilityDiv.innerHTML = `
           <div class="available">
             <i class="fas fa-check-circle"></i> 
@@ -539,6 +525,13 @@ const BookingSystem = {
       const result = await response.json();
       
       if (!response.ok) {
+        // 409: créneau déjà pris (contrôle local du serveur, avant tout appel Graph)
+        if (response.status === 409 && result.conflicts && result.conflicts.length > 0) {
+          const conflict = result.conflicts[0];
+          const conflictStart = new Date(conflict.start).toLocaleTimeString('fr-FR', { hour: '2-digit', minute: '2-digit' });
+          const conflictEnd = new Date(conflict.end).toLocaleTimeString('fr-FR', { hour: '2-digit', minute: '2-digit' });
+          throw new Error(`Salle déjà réservée (${conflictStart} - ${conflictEnd} : ${conflict.subject})`);
+        }
         throw new Error(result.error || `Erreur serveur (${response.status})`);
       }
       
@@ -56,7 +56,12 @@ window.REFRESH_INTERVALS = {
 // URL de l'API pour les opérations CRUD
 window.API_URLS = {
   GET_MEETINGS: '/meetings.json',
+  QUERY_MEETINGS: '/api/meetings',
+  ROOM_NOW: '/rooms/{room}/now',
+  ROOMS_NOW: '/rooms/now',
+  MEETINGS_STREAM: '/meetings/stream',
   CREATE_MEETING: '/api/create-meeting',
+  GET_AVAILABILITY: '/api/availability',
   GET_VEHICLE_BOOKINGS: '/api/vehicle-bookings',
   CREATE_VEHICLE_BOOKING: '/api/create-vehicle-booking',
   GET_EQUIPMENT_BOOKINGS: '/api/equipment-bookings',
@@ -13,6 +13,8 @@ let meetingsContainer = null;
 let isFirstLoad = true;
 let lastRefreshTime = Date.now();
 let debugMode = window.APP_CONFIG?.DEBUG ?? false; // Utiliser la config globale si dispo
+let meetingsStreamConnected = false; // Flux SSE ouvert: le polling réseau est suspendu
+let streamMeetings = null; // Réunions du kiosque tenues à jour par le flux SSE (id -> réunion)
 
 // --- CORRECTION : Définition de formatTime au niveau global du module ---
 /**
@@ -30,6 +32,108 @@ const formatTime = (date) => {
 // --- FIN CORRECTION ---
 
 
+/**
+ * Réunions d'une salle pour aujourd'hui et demain via /api/meetings (pages suivies par curseur)
+ * @param {string} room Nom de la salle (clé de config.ini)
+ * @returns {Promise<Array|null>} Réunions, ou null si le serveur ne connaît pas la salle
+ */
+async function fetchRoomMeetings(room) {
+  const apiUrl = window.API_URLS?.QUERY_MEETINGS || '/api/meetings';
+  const today = new Date(); today.setHours(0, 0, 0, 0);
+  const dayAfterTomorrow = new Date(today); dayAfterTomorrow.setDate(today.getDate() + 2);
+  const localIso = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}T00:00`;
+  const meetings = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ room, from: localIso(today), to: localIso(dayAfterTomorrow) });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${apiUrl}?${params}`, { cache: 'no-cache' });
+    if (response.status === 404) return null;
+    if (!response.ok) {
+      throw new Error(`HTTP Error: ${response.status} ${response.statusText}`);
+    }
+    const page = await response.json();
+    meetings.push(...page.meetings);
+    cursor = page.nextCursor;
+  } while (cursor);
+  if (debugMode) console.log(`fetchMeetings: ${meetings.length} réunion(s) reçue(s) pour ${room}`);
+  return meetings;
+}
+
+/**
+ * Salle affichée par le kiosque (null pour la vue toutes salles)
+ * @returns {string|null} Nom normalisé de la salle
+ */
+function kioskRoomName() {
+  const salleName = window.resourceName || window.salleName;
+  if (!salleName || salleName.toLowerCase() === 'toutes les salles') return null;
+  return salleName.toLowerCase().trim();
+}
+
+/**
+ * Indique si une salle est affichée par ce kiosque (vue toutes salles: toujours)
+ * @param {string} salle Salle d'une réunion
+ * @returns {boolean}
+ */
+function isKioskRoom(salle) {
+  const room = kioskRoomName();
+  if (room === null) return true;
+  if (!salle) return false;
+  const normalized = salle.toLowerCase().trim();
+  return normalized === room || normalized.includes(room) || room.includes(normalized); // Tolérance dans les deux sens
+}
+
+/**
+ * Filtre (aujourd'hui et demain), trie et affiche les réunions; ne redessine que si elles ont changé
+ * @param {Array} meetings Réunions de la salle du kiosque (ou de toutes les salles)
+ * @param {boolean} forceDisplay Redessiner même sans changement (chargement initial ou forcé)
+ */
+function showMeetings(meetings, forceDisplay = false) {
+  // Validation et filtrage par date (aujourd'hui et demain)
+  const today = new Date(); today.setHours(0, 0, 0, 0);
+  const dayAfterTomorrow = new Date(today); dayAfterTomorrow.setDate(today.getDate() + 2);
+
+  meetings = meetings.filter(m => {
+    if (!m.start || !m.end) {
+      console.warn(`Réunion ignorée (date invalide): ${m.subject}`);
+      return false;
+    }
+    try {
+      const meetingDate = new Date(m.start);
+      return meetingDate >= today && meetingDate < dayAfterTomorrow;
+    } catch (e) {
+      console.error(`Erreur date réunion ${m.subject}: ${e.message}`);
+      return false;
+    }
+  });
+  if (debugMode) console.log(`showMeetings: Réunions après filtrage date: ${meetings.length}`);
+
+  // Tri des réunions par heure de début
+  meetings.sort((a, b) => new Date(a.start) - new Date(b.start));
+
+  // Vérifier si les données ont changé
+  const currentMeetingsString = JSON.stringify(meetings);
+  const dataChanged = previousMeetings !== currentMeetingsString;
+  if (debugMode) console.log(`showMeetings: Data changed: ${dataChanged}`);
+
+  if (dataChanged) {
+      previousMeetings = currentMeetingsString;
+  }
+
+  // --- MODIFICATION: Update display logic ---
+  if (forceDisplay || dataChanged) {
+      // Update the display fully if forced OR if data actually changed
+      if (debugMode && dataChanged && !forceDisplay) console.log("showMeetings: Data changed, updating display without loader.");
+      if (debugMode && forceDisplay) console.log("showMeetings: Forced/Initial load, updating display.");
+      updateMeetingsDisplay(meetings); // This function clears and redraws
+  } else {
+      // If no change and no forced loading, just update timers silently
+      if (debugMode) console.log("showMeetings: No data change, updating timers only.");
+      updateMeetingTimers();
+  }
+  // --- END MODIFICATION ---
+}
+
 /**
  * Récupère les réunions depuis l'API
  * @param {boolean} forceVisibleUpdate - Force une mise à jour visible (avec indicateur de chargement)
@@ -82,82 +186,38 @@ async function fetchMeetings(forceVisibleUpdate = false) {
           if (debugMode) console.log("fetchMeetings: Silent background update.");
         }
 
-        const apiUrl = window.API_URLS?.GET_MEETINGS || '/meetings.json';
-        const cacheBust = `?t=${Date.now()}_${Math.random().toString(36).substring(2, 10)}`;
-        const fullUrl = `${apiUrl}${cacheBust}`;
+        // Kiosque d'une salle: seules ses réunions d'aujourd'hui et demain (/api/meetings, filtrées par le serveur);
+        // vue toutes salles ou salle inconnue du serveur: export complet filtré ici
+        const room = kioskRoomName();
+        const isAllRooms = room === null;
+        if (debugMode) console.log(`fetchMeetings: Filtrage pour: "${room}", isAllRooms: ${isAllRooms}`);
 
-        if (debugMode) console.log(`fetchMeetings: API Request to ${fullUrl}`);
+        let meetings = isAllRooms ? null : await fetchRoomMeetings(room);
 
-        const response = await fetch(fullUrl);
+        if (meetings === null) {
+          const apiUrl = window.API_URLS?.GET_MEETINGS || '/meetings.json';
 
-        if (!response.ok) {
-          throw new Error(`HTTP Error: ${response.status} ${response.statusText}`);
-        }
-
-        let meetings = await response.json();
-        if (debugMode) console.log(`fetchMeetings: Raw meetings received: ${meetings.length}`);
-
-        // Filtrage par salle si nécessaire
-        const salleName = window.resourceName || window.salleName;
-        const isAllRooms = !salleName || salleName.toLowerCase() === 'toutes les salles';
-        if (debugMode) console.log(`fetchMeetings: Filtrage pour: "${salleName}", isAllRooms: ${isAllRooms}`);
-
-        if (!isAllRooms && salleName) {
-          const normalizedSalleName = salleName.toLowerCase().trim();
-          const originalCount = meetings.length;
-          meetings = meetings.filter(m =>
-             m.salle && (
-                m.salle.toLowerCase().trim() === normalizedSalleName ||
-                m.salle.toLowerCase().trim().includes(normalizedSalleName) || // Tolérance
-                normalizedSalleName.includes(m.salle.toLowerCase().trim()) // Tolérance inverse
-            )
-          );
-          if (debugMode) console.log(`fetchMeetings: Réunions après filtrage salle: ${meetings.length}/${originalCount}`);
-        }
+          if (debugMode) console.log(`fetchMeetings: API Request to ${apiUrl}`);
 
-        // Validation et filtrage par date (aujourd'hui et demain)
-        const today = new Date(); today.setHours(0, 0, 0, 0);
-        const dayAfterTomorrow = new Date(today); dayAfterTomorrow.setDate(today.getDate() + 2);
+          // Revalidation ETag (If-None-Match) au lieu d'un cache-buster: 304 sans corps si les données n'ont pas changé
+          const response = await fetch(apiUrl, { cache: 'no-cache' });
 
-        meetings = meetings.filter(m => {
-          if (!m.start || !m.end) {
-            console.warn(`Réunion ignorée (date invalide): ${m.subject}`);
-            return false;
+          if (!response.ok) {
+            throw new Error(`HTTP Error: ${response.status} ${response.statusText}`);
           }
-          try {
-            const meetingDate = new Date(m.start);
-            return meetingDate >= today && meetingDate < dayAfterTomorrow;
-          } catch (e) {
-            console.error(`Erreur date réunion ${m.subject}: ${e.message}`);
-            return false;
-          }
-        });
-         if (debugMode) console.log(`fetchMeetings: Réunions après filtrage date: ${meetings.length}`);
-
-        // Tri des réunions par heure de début
-        meetings.sort((a, b) => new Date(a.start) - new Date(b.start));
 
-        // Vérifier si les données ont changé
-        const currentMeetingsString = JSON.stringify(meetings);
-        const dataChanged = previousMeetings !== currentMeetingsString;
-        if (debugMode) console.log(`fetchMeetings: Data changed: ${dataChanged}`);
+          meetings = await response.json();
+          if (debugMode) console.log(`fetchMeetings: Raw meetings received: ${meetings.length}`);
 
-        if (dataChanged) {
-            previousMeetings = currentMeetingsString;
+          // Filtrage par salle si nécessaire
+          if (!isAllRooms) {
+            const originalCount = meetings.length;
+            meetings = meetings.filter(m => isKioskRoom(m.salle));
+            if (debugMode) console.log(`fetchMeetings: Réunions après filtrage salle: ${meetings.length}/${originalCount}`);
+          }
         }
 
-        // --- MODIFICATION: Update display logic ---
-        if (shouldShowLoading || dataChanged) {
-            // Update the display fully if loading was shown OR if data actually changed
-            if (debugMode && dataChanged && !shouldShowLoading) console.log("fetchMeetings: Data changed, updating display without loader.");
-            if (debugMode && shouldShowLoading) console.log("fetchMeetings: Forced/Initial load, updating display.");
-            updateMeetingsDisplay(meetings); // This function clears and redraws
-        } else {
-            // If no change and no forced loading, just update timers silently
-            if (debugMode) console.log("fetchMeetings: No data change, updating timers only.");
-            updateMeetingTimers();
-        }
-        // --- END MODIFICATION ---
+        showMeetings(meetings, shouldShowLoading);
 
         lastRefreshTime = now;
         isFirstLoad = false;
@@ -675,12 +735,56 @@ function initializeParticipantsPopupsStylesAndLogic() {
 }
 
 
+// --- Flux SSE: le serveur pousse les changements, le polling ne sert que de secours ---
+function connectMeetingsStream() {
+  if (!window.EventSource) return; // Navigateur sans SSE: polling classique
+  const source = new EventSource(window.API_URLS?.MEETINGS_STREAM || '/meetings/stream');
+  source.onopen = () => {
+    meetingsStreamConnected = true;
+    if (debugMode) console.log("Flux SSE réunions connecté, polling suspendu.");
+  };
+  // Instantané (connexion ou reprise impossible): remplace l'état local, sans requête supplémentaire
+  source.addEventListener('snapshot', (event) => {
+    try {
+      streamMeetings = new Map(JSON.parse(event.data).filter(m => isKioskRoom(m.salle)).map(m => [m.id, m]));
+    } catch (e) {
+      console.error("Flux SSE: instantané illisible, rechargement.", e);
+      streamMeetings = null;
+      fetchMeetings(false);
+      return;
+    }
+    showMeetings([...streamMeetings.values()]);
+    lastRefreshTime = Date.now();
+  });
+  // Diff par salle: appliqué localement, les salles que ce kiosque n'affiche pas sont ignorées
+  source.addEventListener('update', (event) => {
+    if (!streamMeetings) return fetchMeetings(false); // Pas d'instantané valide auquel appliquer le diff
+    let diff;
+    try { diff = JSON.parse(event.data); } catch (e) { console.error("Flux SSE: diff illisible.", e); return; }
+    let touched = false;
+    for (const [salle, change] of Object.entries(diff.rooms || {})) {
+      if (!isKioskRoom(salle)) continue;
+      touched = true;
+      change.removed.forEach(id => streamMeetings.delete(id));
+      [...change.added, ...change.changed].forEach(id => streamMeetings.set(id, diff.meetings[id]));
+    }
+    if (touched) showMeetings([...streamMeetings.values()]);
+    lastRefreshTime = Date.now();
+  });
+  source.onerror = () => {
+    // EventSource se reconnecte seul (avec Last-Event-ID); polling en attendant
+    meetingsStreamConnected = false;
+    if (debugMode) console.log("Flux SSE réunions interrompu, reprise du polling.");
+  };
+}
+
 // --- Initialisation et Auto-Refresh ---
 // Initialiser au chargement du DOM
 document.addEventListener('DOMContentLoaded', () => {
   // ... (récupération config, fetchMeetings initial) ...
   if (debugMode) console.log("DOM Chargé: Initialisation du module Meetings.");
   fetchMeetings(true); // Premier chargement forcé visible
+  connectMeetingsStream();
 
   // Configurer l'auto-refresh si activé
   const refreshInterval = window.APP_CONFIG?.REFRESH_INTERVAL || 10000; // 10 secondes par défaut
@@ -691,6 +795,10 @@ document.addEventListener('DOMContentLoaded', () => {
   if (autoRefreshEnabled) {
       if (debugMode) console.log(`Auto-refresh activé toutes les ${refreshInterval / 1000} secondes.`);
       setInterval(() => {
+          if (meetingsStreamConnected) {
+             updateMeetingTimers(); // Statuts/chronos recalculés localement, sans requête
+             return;
+          }
           const timeSinceLastRefresh = Date.now() - lastRefreshTime;
           // Forcer visible SEULEMENT si > 5 mins (longInactivityThreshold)
           const forceVisible = timeSinceLastRefresh > longInactivityThreshold;
@@ -706,6 +814,10 @@ document.addEventListener('DOMContentLoaded', () => {
   // Ajouter un listener pour rafraîchir quand l'onglet redevient visible
   document.addEventListener('visibilitychange', () => {
       if (!document.hidden) { // Si l'onglet DEVIENT visible
+          if (meetingsStreamConnected) {
+             updateMeetingTimers(); // Flux SSE ouvert: données déjà à jour, statuts recalculés localement
+             return;
+          }
           const timeSinceLastRefresh = Date.now() - lastRefreshTime;
           // --- CORRECTION CLÉ ---
           // Si inactif depuis longtemps (> 5min), forcer visible
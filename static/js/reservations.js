@@ -422,7 +422,7 @@ const ReservationSystem = {
         try {
             // Dans un système réel, appeler l'API pour obtenir les réservations
             // Ici, utiliser les réunions disponibles
-            const response = await fetch(`${window.API_URLS.GET_MEETINGS}?t=${Date.now()}`);
+            const response = await fetch(window.API_URLS.GET_MEETINGS, { cache: 'no-cache' });
             let meetings = await response.json();
             
             // Convertir les réunions en format de réservation
@@ -1877,7 +1877,7 @@ const ReservationSystem = {
     /**
      * Met à jour le message de disponibilité d'une salle
      */
-    updateRoomAvailabilityMessage() {
+    async updateRoomAvailabilityMessage() {
         const roomSelect = document.getElementById('booking-room-select');
         const availabilityDiv = document.getElementById('room-availability');
         const startTimeInput = document.getElementById('booking-start');
@@ -1924,32 +1924,47 @@ const ReservationSystem = {
             return;
         }
         
-        // Vérifier les conflits
+        // Vérifier les conflits côté serveur (index par salle, à jour des réservations qui viennent d'être créées)
         let isAvailable = true;
+        let isVerified = true; // Faux si le créneau sort de la période synchronisée par le serveur
         let conflictingBooking = null;
         
-        // Filtrer les réservations de la même salle
-        const roomBookings = this.state.bookings.rooms.filter(booking => 
-            booking.resourceId === roomId
-        );
-        
-        // Vérifier chaque réservation pour un conflit
-        for (const booking of roomBookings) {
-            const bookingStart = new Date(booking.startTime);
-            const bookingEnd = new Date(booking.endTime);
-            
-            // Vérifier si les plages horaires se chevauchent
-            if ((startDateTime >= bookingStart && startDateTime < bookingEnd) || 
-                (endDateTime > bookingStart && endDateTime <= bookingEnd) ||
-                (startDateTime <= bookingStart && endDateTime >= bookingEnd)) {
-                isAvailable = false;
-                conflictingBooking = booking;
-                break;
+        try {
+            const params = new URLSearchParams({
+                room: roomId,
+                from: `${selectedDate}T${startTime}`,
+                to: `${selectedDate}T${endTime}`
+            });
+            const response = await fetch(`${window.API_URLS.GET_AVAILABILITY}?${params}`, { cache: 'no-cache' });
+            if (!response.ok) throw new Error(`Erreur HTTP: ${response.status}`);
+            const availability = await response.json();
+            const roomAvailability = availability.rooms[0];
+            isAvailable = roomAvailability.available;
+            isVerified = availability.complete;
+            if (!isAvailable) {
+                const conflict = roomAvailability.busy[0];
+                conflictingBooking = { subject: conflict.subject, startTime: conflict.start, endTime: conflict.end };
             }
+        } catch (error) {
+            console.error('Erreur lors de la vérification de disponibilité:', error);
+            availabilityDiv.innerHTML = `
+                <div class="occupied">
+                    <i class="fas fa-exclamation-triangle"></i> 
+                    Impossible de vérifier la disponibilité
+                </div>
+            `;
+            return;
         }
         
         // Afficher le résultat
-        if (isAvailable) {
+        if (isAvailable && !isVerified) {
+            availabilityDiv.innerHTML = `
+                <div class="unverified">
+                    <i class="fas fa-question-circle"></i> 
+                    Disponibilité non vérifiable à cette date (contrôlée par Exchange à la réservation)
+                </div>
+            `;
+        } else if (isAvailable) {
             availabilityDiv.innerHTML = `
                 <div class="available">
                     <i class="fas fa-check-circle"></i> 
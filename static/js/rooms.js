@@ -289,11 +289,59 @@ const RoomsSystem = {
   },
   
   /**
-   * Met à jour le statut des salles en fonction des réunions
+   * Met à jour le statut des salles: réunions déjà chargées par le kiosque pour les salles qu'il affiche,
+   * documents /rooms/now (en cours/suivante pré-calculés par le serveur, 304 si inchangés) pour les autres
    */
-  updateRoomStatus() {
+  async updateRoomStatus() {
     console.log("Mise à jour du statut des salles");
     
+    // Kiosque d'une salle: previousMeetings ne contient que celle-ci; vue toutes salles: toutes (aucune requête)
+    const otherRooms = Object.keys(this.rooms).filter(roomKey => !isKioskRoom(roomKey));
+    const missing = new Set(otherRooms);
+    if (otherRooms.length) {
+      try {
+        const response = await fetch(window.API_URLS?.ROOMS_NOW || '/rooms/now', { cache: 'no-cache' });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const now = new Date();
+        for (const snapshot of (await response.json()).rooms) {
+          if (!missing.delete(snapshot.room)) continue; // Salle du kiosque ou absente de la grille
+          this.applyRoomSnapshot(this.rooms[snapshot.room], snapshot, now);
+        }
+      } catch (e) {
+        console.warn("Statut des salles indisponible, calcul depuis les réunions chargées:", e);
+      }
+    }
+    // Salles du kiosque, et repli pour celles que le serveur n'a pas renvoyées
+    this.updateRoomStatusFromMeetings([...Object.keys(this.rooms).filter(roomKey => isKioskRoom(roomKey)), ...missing]);
+  },
+  
+  /**
+   * Applique à une salle son document /rooms/<salle>/now
+   */
+  applyRoomSnapshot(room, snapshot, now) {
+    room.status = 'available';
+    room.currentMeeting = snapshot.current;
+    room.nextMeeting = snapshot.next;
+    
+    if (snapshot.busy) {
+      // Réunion en cours: temps restant jusqu'à sa fin
+      room.status = 'occupied';
+      room.remainingTime = Math.ceil((new Date(snapshot.current.end) - now) / 60000);
+    } else if (snapshot.next) {
+      // Si la prochaine réunion commence dans moins de 30 minutes
+      const minutesUntilStart = Math.floor((new Date(snapshot.next.start) - now) / 60000);
+      if (minutesUntilStart <= 30) {
+        room.status = 'soon';
+        room.minutesUntilNext = minutesUntilStart;
+      }
+    }
+  },
+  
+  /**
+   * Met à jour le statut des salles en fonction des réunions déjà chargées
+   * @param {Array<string>} roomKeys Salles à recalculer (toutes par défaut)
+   */
+  updateRoomStatusFromMeetings(roomKeys = Object.keys(this.rooms)) {
     // Récupérer les réunions courantes
     let meetings = [];
     try {
@@ -306,7 +354,8 @@ const RoomsSystem = {
     const now = new Date();
     
     // Réinitialiser les données des salles
-    for (const roomKey in this.rooms) {
+    const selected = new Set(roomKeys);
+    for (const roomKey of selected) {
       this.rooms[roomKey].status = 'available';
       this.rooms[roomKey].currentMeeting = null;
       this.rooms[roomKey].nextMeeting = null;
@@ -315,7 +364,7 @@ const RoomsSystem = {
     // Traiter chaque réunion
     meetings.forEach(meeting => {
       const roomName = (meeting.salle || '').toLowerCase();
-      if (this.rooms[roomName]) {
+      if (selected.has(roomName)) {
         const startTime = new Date(meeting.start);
         const endTime = new Date(meeting.end);
         